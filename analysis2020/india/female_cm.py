@@ -5,6 +5,7 @@
 #  Data Source: https://en.wikipedia.org/wiki/List_of_female_Indian_chief_ministers
 import yaml
 
+from helpers.output import output_path, show
 from india.models import *
 
 ALL_DATA = ["Uttar Pradesh", "Odisha", "Goa", "Assam", "Tamil Nadu", "Punjab",
@@ -22,7 +23,7 @@ def map_data(data, states: Dict[str, State], ax: plt.Axes = None):
 
 
 def draw_map():
-    with open("india/states.yml") as f:
+    with open(META_FILE) as f:
         meta = yaml.load(f, Loader=yaml.SafeLoader)
 
     plt.figure(figsize=(10, 8))
@@ -31,8 +32,8 @@ def draw_map():
     map_data(ALL_DATA, sts, mp.ax)
     mp.draw()
     plt.title("States with at least one female Chief Minister (1947-2020)")
-    plt.savefig("plot.png", dpi=150)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=150)
+    show()
 
 
 def run():
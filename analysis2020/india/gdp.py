@@ -8,6 +8,7 @@
 import csv
 import yaml
 
+from helpers.output import output_path, show
 from india.models import *
 
 
@@ -35,7 +36,7 @@ def map_data(data, states: Dict[str, State], ax: plt.Axes = None):
 
 
 def draw_map():
-    with open("india/states.yml") as f:
+    with open(META_FILE) as f:
         meta = yaml.load(f, Loader=yaml.SafeLoader)
 
     plt.figure(figsize=(10, 8))
@@ -46,8 +47,8 @@ def draw_map():
     data = [x[0] for x in data[:11]]
     map_data(data, sts, mp.ax)
     mp.draw()
-    plt.savefig("plot.png", dpi=150)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=150)
+    show()
 
 
 def split_states(data):
@@ -6,6 +6,7 @@
 
 import yaml
 
+from helpers.output import show
 from india.models import *
 
 data = {
@@ -63,7 +64,7 @@ def map_data(states: Dict[str, State], ax: plt.Axes = None):
 
 def prepare_map():
     p = Palette()
-    with open("india/states.yml") as f:
+    with open(META_FILE) as f:
         meta = yaml.load(f, Loader=yaml.SafeLoader)
 
     # plt.figure(figsize=(10, 8))
@@ -94,7 +95,7 @@ def prepare_map():
     mp.ax.set_frame_on(False)
 
     # plt.savefig("plot.png", dpi=150, transparent=True)
-    plt.show()
+    show()
 
 
 def run():
@@ -17,17 +17,36 @@ import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import geopandas
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 from SecretColors import Palette
 from shapely.geometry.multipolygon import MultiPolygon
 from shapely.geometry.polygon import Polygon
+from shapely.ops import unary_union
+
+from helpers.cache import (HAS_PYARROW, cache_path, read_shapefile,
+                           remove_stale, source_key, write_atomic)
+from helpers.choropleth import choropleth
+from helpers.clip import add_clipped_feature
+from helpers.extremes import extreme_points
+from helpers.output import show
+from helpers.spatial import RegionIndex
 
 palette = Palette()
 
+# Meta data of the states (ISO codes, short names, synonyms). Path does not
+# depend on the working folder, batch runner runs everything from the root
+META_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "states.yml")
+
 
 class State:
     STATES = "States"
     SYN = "Synonymous"
 
+    __slots__ = ("_name", "meta", "geometry", "color", "edge", "_label",
+                 "value", "show_label", "_resolved", "_centroid")
+
     def __init__(self, name: str, meta: dict = None):
         self._name = name
         self.meta = meta
@@ -37,6 +56,8 @@ class State:
         self._label = None
         self.value = 0
         self.show_label = False
+        self._resolved = False
+        self._centroid = None
 
     def _get_name(self):
         # If meta file is not provided, just return the name
@@ -51,17 +72,27 @@ class State:
             return self.meta[State.SYN][self._name]
         return None
 
+    @property
+    def centroid(self):
+        # Centroid is cached, hence geometry should not be replaced
+        # after x or y is accessed
+        if self._centroid is None:
+            self._centroid = self.geometry.centroid
+        return self._centroid
+
     @property
     def x(self):
-        return self.geometry.centroid.x
+        return self.centroid.x
 
     @property
     def y(self):
-        return self.geometry.centroid.y
+        return self.centroid.y
 
     @property
     def name(self) -> str:
-        return self._get_name()
+        if self._resolved is False:
+            self._resolved = self._get_name()
+        return self._resolved
 
     @property
     def label(self):
@@ -92,6 +123,128 @@ class State:
             return self.name is not None
 
 
+class StateRegistry:
+    """
+    Struct-of-arrays storage for all the states of a map. Every attribute
+    is a column of the GeoDataFrame `df` (indexed by the state name) and
+    is computed for all states at once. `StateView` objects give the same
+    interface as `State` on top of it.
+
+    For lower admin levels, rows are the districts / sub-districts indexed
+    by their unique names given in `units`. State of every row is kept in
+    the `state` column and `labels` (default: units) are used as labels.
+    """
+    COL_NAME = "name"
+    COL_STATE = "state"
+    COL_ISO = "iso"
+    COL_LABEL = "label"
+    COL_X = "x"
+    COL_Y = "y"
+    COL_COLOR = "color"
+    COL_EDGE = "edge"
+    COL_VALUE = "value"
+    COL_SHOW_LABEL = "show_label"
+    COL_GEOMETRY = "geometry"
+
+    def __init__(self, names, geometries: geopandas.GeoSeries,
+                 meta: dict = None, show_label: bool = False, units=None,
+                 labels=None):
+        names = pd.Series(list(names), dtype=object)
+        geometries = geopandas.GeoSeries(list(geometries),
+                                         crs=geometries.crs)
+        if meta is None:
+            iso = pd.Series("N/A", index=names.index, dtype=object)
+            label = names
+        else:
+            known = meta[State.STATES]
+            names = names.where(names.isin(list(known)),
+                                names.map(meta[State.SYN]))
+            iso = names.map({k: v["code"] for k, v in known.items()})
+            label = names.map({k: v["short"] for k, v in known.items()
+                               if "short" in v}).fillna(names)
+
+        with warnings.catch_warnings():
+            # Centroids in geographic CRS are fine for placing labels
+            warnings.simplefilter("ignore", category=UserWarning)
+            centroids = geometries.centroid
+
+        key = names
+        if units is not None:
+            key = pd.Series(list(units), dtype=object)
+            label = key if labels is None else pd.Series(list(labels),
+                                                         dtype=object)
+
+        df = geopandas.GeoDataFrame({
+            self.COL_NAME: key,
+            self.COL_STATE: names,
+            self.COL_ISO: iso,
+            self.COL_LABEL: label,
+            self.COL_X: centroids.x,
+            self.COL_Y: centroids.y,
+            self.COL_COLOR: palette.ultramarine(shade=40),
+            self.COL_EDGE: palette.gray(shade=80),
+            self.COL_VALUE: 0,
+            self.COL_SHOW_LABEL: show_label,
+        }, geometry=geometries)
+        # Same as earlier dictionary: invalid names are skipped and last
+        # entry wins in case of duplicates (units are already unique)
+        df = df[df[self.COL_STATE].notna()]
+        df = df.drop_duplicates(subset=self.COL_NAME, keep="last")
+        self.df = df.set_index(self.COL_NAME, drop=False)
+
+    def __len__(self):
+        return len(self.df)
+
+    def get(self, name: str, column: str):
+        return self.df.at[name, column]
+
+    def set(self, name: str, column: str, value):
+        self.df.at[name, column] = value
+
+    def set_geometry(self, name: str, geometry):
+        # Label position follows the new geometry
+        self.df.at[name, self.COL_GEOMETRY] = geometry
+        self.df.at[name, self.COL_X] = geometry.centroid.x
+        self.df.at[name, self.COL_Y] = geometry.centroid.y
+
+    def views(self) -> Dict[str, "StateView"]:
+        return {x: StateView(self, x) for x in self.df.index}
+
+
+class StateView:
+    """
+    Light weight view of a single row of `StateRegistry` with the same
+    interface as `State`
+    """
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: StateRegistry, name: str):
+        self._registry = registry
+        self._name = name
+
+    def _column(column):
+        return property(lambda self: self._registry.get(self._name, column),
+                        lambda self, value: self._registry.set(
+                            self._name, column, value))
+
+    name = property(lambda self: self._name)
+    state = _column(StateRegistry.COL_STATE)
+    is_valid = property(lambda self: True)
+    iso = _column(StateRegistry.COL_ISO)
+    label = _column(StateRegistry.COL_LABEL)
+    x = _column(StateRegistry.COL_X)
+    y = _column(StateRegistry.COL_Y)
+    color = _column(StateRegistry.COL_COLOR)
+    edge = _column(StateRegistry.COL_EDGE)
+    value = _column(StateRegistry.COL_VALUE)
+    show_label = _column(StateRegistry.COL_SHOW_LABEL)
+    geometry = property(
+        lambda self: self._registry.get(self._name,
+                                        StateRegistry.COL_GEOMETRY),
+        lambda self, value: self._registry.set_geometry(self._name, value))
+    del _column
+
+
 class IndianMap:
     COL_STATE = "NAME_1"
     COL_COLOR = "color"
@@ -101,6 +254,9 @@ class IndianMap:
         self.filename = f"data/India/IND_adm{level}.shp"
         self.override_jk = True
         self._states = {}
+        self._registry = None  # type: StateRegistry
+        self._index = None
+        self._extremes = None
         self.jk_file = "data/extra/Indian_States.shp"
         self.level = level
         self._df = None
@@ -143,38 +299,120 @@ class IndianMap:
                           "region not found. Skipping the correction.")
             return
 
-        if self.level != 1:
-            warnings.warn("Jammu and Kashmir correction can be only applied "
-                          "to level 1 admin map. In current case, you have "
-                          "to do it by yourself.")
+        jk = read_shapefile(self.jk_file)
+        gm = jk.loc[jk["st_nm"] == "Jammu & Kashmir",
+                    self.COL_GEOMETRY].values[0]
+        in_jk = (df[self.COL_STATE] == "Jammu and Kashmir").to_numpy()
+
+        if self.level == 1:
+            df.loc[in_jk, self.COL_GEOMETRY] = gm
             return
-        jk = geopandas.read_file(self.jk_file)
-        gm = jk.loc[
-            jk["st_nm"] == "Jammu & Kashmir",
-            [self.COL_GEOMETRY]].values[0]
 
-        df.loc[df[self.COL_STATE] == "Jammu and Kashmir", [
-            self.COL_GEOMETRY]] = gm
+        # Lower admin levels: only units intersecting the corrected boundary
+        # (found with spatial index) are clipped. Units of other states lose
+        # whatever overlaps with it and Jammu and Kashmir units are clipped
+        # to it.
+        geometries = df[self.COL_GEOMETRY].to_numpy().copy()
+        for i in df.sindex.query(gm, predicate="intersects"):
+            if in_jk[i]:
+                geometries[i] = geometries[i].intersection(gm)
+            else:
+                geometries[i] = geometries[i].difference(gm)
 
-    def generate_data(self):
-        df = geopandas.read_file(self.filename)
+        # Disputed area which is not covered by any unit is given to the
+        # nearest Jammu and Kashmir unit
+        jk_index = np.flatnonzero(in_jk)
+        if len(jk_index) > 0:
+            extra = gm.difference(unary_union(geometries[jk_index]))
+            for part in getattr(extra, "geoms", [extra]):
+                if part.is_empty or part.area == 0:
+                    continue
+                distances = [geometries[i].distance(part) for i in jk_index]
+                nearest = jk_index[int(np.argmin(distances))]
+                geometries[nearest] = geometries[nearest].union(part)
+
+        df[self.COL_GEOMETRY] = geometries
+
+    def _read_data(self) -> geopandas.GeoDataFrame:
+        # Corrected map is cached next to the cache of the admin file and is
+        # refreshed whenever admin file or Jammu and Kashmir file changes
+        if not self.override_jk or not os.path.isfile(self.jk_file):
+            df = read_shapefile(self.filename)
+            self._adjust_jk(df)
+            return df
+
+        cached = cache_path(self.filename, "jk.parquet",
+                            source_key(self.jk_file))
+        if HAS_PYARROW and os.path.isfile(cached):
+            return geopandas.read_parquet(cached)
+
+        df = read_shapefile(self.filename)
         self._adjust_jk(df)
+        if HAS_PYARROW:
+            try:
+                write_atomic(df, cached)
+                remove_stale(self.filename, cached, "jk.parquet")
+            except OSError as e:
+                warnings.warn(f"Unable to write shape file cache: {e}")
+        return df
+
+    def generate_data(self):
+        df = self._read_data()
         df[self.COL_COLOR] = palette.blue(shade=40)
         self._df = df
 
+    @property
+    def registry(self) -> StateRegistry:
+        return self._registry
+
+    @property
+    def index(self) -> RegionIndex:
+        # Spatial index for mapping lon/lat points to the states
+        if self._index is None:
+            self._index = RegionIndex.from_frame(self.df, self.COL_STATE)
+        return self._index
+
+    @property
+    def extremes(self) -> pd.DataFrame:
+        # Extreme points of every state (see helpers.extremes)
+        if self._extremes is None:
+            self._extremes = extreme_points(self.df[self.COL_STATE],
+                                            self.df[self.COL_GEOMETRY])
+        return self._extremes
+
+    def _unit_names(self) -> pd.Series:
+        # Names of districts / sub-districts are not unique (e.g. Aurangabad
+        # in Bihar and Maharashtra). Repeated names are qualified with the
+        # names of the higher levels and then numbered if still repeated.
+        columns = [f"NAME_{x}" for x in range(self.level, 0, -1)]
+        names = self.df[columns[0]].astype(str)
+        repeated = names.duplicated(keep=False)
+        if repeated.any():
+            full = self.df[columns].astype(str).agg(", ".join, axis=1)
+            names = names.where(~repeated, full)
+            count = names.groupby(names).cumcount()
+            repeated = names.duplicated(keep=False)
+            names = names.where(~repeated,
+                                names + " (" + (count + 1).astype(str) + ")")
+        return names
+
     def generate_states(self, meta=None):
-        tmp = []
-        for _, row in self.df.iterrows():
-            s = State(row[self.COL_STATE], meta)
-            s.geometry = row[self.COL_GEOMETRY]
-            s.show_label = self.show_label
-            tmp.append(s)
-        self._states = {x.name: x for x in tmp if x.is_valid}
+        # Below level 1, every district / sub-district is a separate entry
+        units, labels = None, None
+        if self.level > 1:
+            units = self._unit_names()
+            labels = self.df[f"NAME_{self.level}"]
+        self._registry = StateRegistry(self.df[self.COL_STATE],
+                                       self.df[self.COL_GEOMETRY],
+                                       meta,
+                                       self.show_label,
+                                       units, labels)
+        self._states = self._registry.views()
         return self.states
 
     def show(self):
         self.draw()
-        plt.show()
+        show()
 
     def draw(self):
         if self._df is None:
@@ -184,18 +422,23 @@ class IndianMap:
             self._draw_empty(self.df)
             self.df.plot(color=self.df[self.COL_COLOR])
         else:
-            self.ax.add_feature(cfeature.BORDERS, alpha=0.5)
-            self.ax.add_feature(cfeature.COASTLINE, alpha=0.5)
-            self.ax.add_feature(cfeature.OCEAN, alpha=0.2)
-            self.ax.add_feature(cfeature.LAND, alpha=0.2)
-            for s in self.states.values():
-                self.ax.add_geometries([s.geometry],
-                                       fc=s.color,
-                                       ec=s.edge,
-                                       lw=0.5,
-                                       crs=ccrs.PlateCarree())
-                if s.show_label:
-                    self.ax.text(s.x, s.y, s.label,
-                                 ha="center", va="center")
+            # Extent is needed before drawing for clipping and the level
+            # of detail
             self.ax.set_extent(self.extent,
                                crs=ccrs.PlateCarree())
+            add_clipped_feature(self.ax, cfeature.BORDERS, alpha=0.5)
+            add_clipped_feature(self.ax, cfeature.COASTLINE, alpha=0.5)
+            add_clipped_feature(self.ax, cfeature.OCEAN, alpha=0.2)
+            add_clipped_feature(self.ax, cfeature.LAND, alpha=0.2)
+            df = self.registry.df
+            colors = dict(zip(df.index, df[StateRegistry.COL_COLOR]))
+            choropleth(self.ax, colors,
+                       shapes=dict(zip(df.index, df.geometry)),
+                       edges=dict(zip(df.index, df[StateRegistry.COL_EDGE])),
+                       lw=0.5,
+                       src_crs=ccrs.PlateCarree())
+            labels = df[df[StateRegistry.COL_SHOW_LABEL].astype(bool)]
+            for x, y, label in zip(labels[StateRegistry.COL_X],
+                                   labels[StateRegistry.COL_Y],
+                                   labels[StateRegistry.COL_LABEL]):
+                self.ax.text(x, y, label, ha="center", va="center")
@@ -13,17 +13,25 @@
 # Shijith Kunhitty
 # https://groups.google.com/forum/#!topic/datameet/12L5jtjUKhI
 
+import warnings
+
 import cartopy.crs as ccrs
-import geopandas
 import matplotlib
 import matplotlib.animation as animation
 import matplotlib.gridspec as gridspec
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from SecretColors import Palette
 from SecretColors.cmaps import ColorMap
 from matplotlib.animation import FuncAnimation
 
+from helpers.cache import read_shapefile
+from helpers.choropleth import choropleth, update_colors
+from helpers.output import output_path
+from helpers.render import render_parallel
+from helpers.spatial import RegionIndex
+
 p = Palette()
 
 color_list = p.blue(no_of_colors=20, starting_shade=30, ending_shade=100)
@@ -53,7 +61,7 @@ def generate_divisions():
     Data cleanup function
     """
     shape_file = "data/meterological/indian_met_zones v2.shp"
-    df = geopandas.read_file(shape_file)
+    df = read_shapefile(shape_file)
 
     # Generate mapping for shape files and actual data
     # This step is necessary because naming standard is not sane in both data
@@ -81,11 +89,23 @@ def generate_divisions():
     return divisions
 
 
+def division_index(sub) -> RegionIndex:
+    """
+    Spatial index for mapping lon/lat points (e.g. rain gauge stations) to
+    the subdivisions
+    """
+    return RegionIndex(list(sub), [d.geometry for d in sub.values()])
+
+
 def draw_map(ax, sub):
-    for d in sub.values():
-        ax.add_geometries([d.geometry],
-                          crs=ccrs.PlateCarree(),
-                          fc=d.color)
+    """
+    Draws all subdivisions as a single collection. Colors of the returned
+    collection can be later changed with `update_colors` without drawing
+    the geometries again.
+    """
+    shapes = {k: d.geometry for k, d in sub.items()}
+    return choropleth(ax, {k: d.color for k, d in sub.items()},
+                      shapes=shapes)
 
 
 MONTH = {
@@ -94,42 +114,74 @@ MONTH = {
 }
 
 
-def animate(y, ax, ax2, sub, df, max_rain):
+class RainfallCube:
+    """
+    Rainfall data as dense array of shape (year, month, subdivision).
+    Subdivisions are in the same order as given divisions (usually keys of
+    `generate_divisions()`). Normalized values and per frame averages are
+    computed once, so that every animation frame is just an array slice.
     """
-    Animation function
 
-    :param y: frame index
+    def __init__(self, df: pd.DataFrame, divisions: list):
+        months = list(MONTH.values())
+        self.divisions = list(divisions)
+        self.start_year = int(df["YEAR"].min())
+        no_of_years = int(df["YEAR"].max()) - self.start_year + 1
+
+        index = {x: i for i, x in enumerate(self.divisions)}
+        div_index = df["SUBDIVISION"].map(index)
+        df = df[div_index.notna()]
+        div_index = div_index[div_index.notna()].to_numpy(dtype=int)
+        year_index = df["YEAR"].to_numpy(dtype=int) - self.start_year
+
+        self.values = np.full((no_of_years, 12, len(self.divisions)), np.nan)
+        self.values[year_index, :, div_index] = df[months].to_numpy(
+            dtype=float)
+
+        self.max_rain = np.nanmax(self.values)
+        self.normalized = self.values / self.max_rain
+        with warnings.catch_warnings():
+            # Years without any data will give empty slice warning
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            self.average = np.nanmean(self.values, axis=2)
+
+    def __len__(self):
+        return self.values.shape[0] * 12
+
+    def frame(self, y: int):
+        """
+        Data for given animation frame
+
+        :param y: Frame index (months since the start year)
+        :return: year, month index, normalized values of all subdivisions
+            and average rainfall
+        """
+        year, m = divmod(y, 12)
+        return (self.start_year + year, m, self.normalized[year, m],
+                self.average[year, m])
+
+
+def init_map(ax, ax2, sub, cube: RainfallCube):
+    """
+    Creates all the artists only once. Every frame just updates them.
+
     :param ax: axes for main figure
     :param ax2: axes for bottom bar
     :param sub: dictionary of our data class
-    :param df: Rainfall data
-    :param max_rain: Maximum rainfall for normalization
-    """
-    current_year = 1901 + int(y / 12)
-    year_df = df[df["YEAR"] == current_year]
-    m = y % 12
-    for k in sub.values():
-        k.value = None
-
-    total_rainfall = 0
-    months = 0
-    for _, row in year_df.iterrows():
-        months += 1
-        value = row[MONTH[m]]
-        total_rainfall += value
-        sub[row["SUBDIVISION"]].value = value / max_rain
-
-    total_rainfall = total_rainfall / months
-    ax.clear()
-    ax.annotate(f"{MONTH[m]} {current_year}", (1, 1.01),
-                fontsize=12,
-                ha="right",
-                va="top",
-                alpha=0.8,
-                bbox=dict(facecolor=p.red(shade=20), edgecolor='none'),
-                fontfamily="IBM Plex Mono",
-                xycoords='axes fraction')
-    draw_map(ax, sub)
+    :param cube: Precomputed rainfall data
+    :return: Collection of subdivisions, date label and yearly bars
+    """
+    # Extent is needed before drawing for clipping and the level of detail
+    ax.set_extent([67.0, 98.0, 5.0, 38.0], crs=ccrs.PlateCarree())
+    collection = draw_map(ax, sub)
+    date = ax.annotate("", (1, 1.01),
+                       fontsize=12,
+                       ha="right",
+                       va="top",
+                       alpha=0.8,
+                       bbox=dict(facecolor=p.red(shade=20), edgecolor='none'),
+                       fontfamily="IBM Plex Mono",
+                       xycoords='axes fraction')
     ax.annotate("Rainfall in Meteorological Subdivisions of India",
                 (0.5, 1.1),
                 fontsize=14,
@@ -139,24 +191,47 @@ def animate(y, ax, ax2, sub, df, max_rain):
                 fontfamily="IBM Plex Sans",
                 xycoords='axes fraction')
 
-    ax.set_extent([67.0, 98.0, 5.0, 38.0], crs=ccrs.PlateCarree())
     ax.axis("off")
-    set_bottom_bar(ax2, m, current_year, total_rainfall)
+    bars = set_bottom_bar(ax2, cube)
+    return collection, date, bars
 
 
-def set_bottom_bar(ax2, current, year, total_rainfall):
+def animate(y, cube: RainfallCube, artists):
     """
-    Function to set up bottom month bar
+    Animation function
+
+    :param y: frame index
+    :param cube: Precomputed rainfall data
+    :param artists: Artists created by `init_map`
+    :return: Artists changed in this frame (used for blitting)
+    """
+    collection, date, bars = artists
+    current_year, m, values, total_rainfall = cube.frame(y)
+    update_colors(collection, dict(zip(cube.divisions, values)),
+                  cmap=bm,
+                  missing=p.gray(shade=30))
+    date.set_text(f"{MONTH[m]} {current_year}")
+
+    # Bar shows the highest monthly average of the year so far
+    bar = bars[current_year - cube.start_year]
+    if not np.isnan(total_rainfall):
+        bar.set_height(max(bar.get_height(), total_rainfall))
+    return collection, date, bar
+
+
+def set_bottom_bar(ax2, cube: RainfallCube):
+    """
+    Function to set up bottom year bar
 
-    :param total_rainfall: Total rainfall for the year
     :param ax2: Axes
-    :param current: Current month
-    :param year: Current year
+    :param cube: Precomputed rainfall data
+    :return: Bars of all the years (with zero height)
     """
-    # ax2.clear()
+    years = np.arange(len(cube) // 12) + cube.start_year - 1900
+    bars = ax2.bar(years, np.zeros(len(years)), color=p.red(shade=30),
+                   width=1)
     ax2.set_xlim(1, 115)
-    # ax2.set_ylim(0, 1)
-    ax2.bar(year - 1900, total_rainfall, color=p.red(shade=30), width=1)
+    ax2.set_ylim(0, np.nanmax(cube.average) * 1.05)
 
     labels = [0, 25, 50, 75, 100, 115]
     ax2.set_xticks(labels)
@@ -170,18 +245,22 @@ def set_bottom_bar(ax2, current, year, total_rainfall):
     ax2.set_ylabel("Rainfall (mm)", fontsize=9, labelpad=2,
                    fontfamily="IBM Plex Sans", color=p.gray())
     ax2.grid(axis="y", zorder=0, ls="--", color=p.gray())
+    return bars
 
 
-def run():
+def setup_figure():
+    """
+    Creates the figure with all its artists
+
+    :return: Figure and arguments for the `animate` function
+    """
     fig = plt.figure(figsize=(8, 8))
     gs = gridspec.GridSpec(8, 8)
     ax = fig.add_subplot(gs[:-2, :], projection=ccrs.PlateCarree())
     ax2 = fig.add_subplot(gs[-2, :])
     ax3 = fig.add_subplot(gs[-1, :])
     sub = generate_divisions()
-    df = pd.read_csv("data/rainfall.csv")
-    max_rain = df.iloc[:, 2:14]
-    max_rain = max(max_rain.max().values)
+    cube = RainfallCube(pd.read_csv("data/rainfall.csv"), list(sub))
 
     ax3.axis("off")
     ax3.annotate("Colors are normalized to highest rainfall amount.\nDarker "
@@ -192,11 +271,37 @@ def run():
                  fontfamily="IBM Plex Sans",
                  xycoords="axes fraction", ha="right")
 
+    artists = init_map(ax, ax2, sub, cube)
+    return fig, (cube, artists)
+
+
+def run(blit: bool = False, jobs: int = 1):
+    """
+    Renders the animation to rainfall.mp4
+
+    :param blit: Use blitting for FuncAnimation
+    :param jobs: Number of processes. If more than 1, frames are rendered
+        in parallel with `helpers.render.render_parallel`
+    """
+    fig, fargs = setup_figure()
+    cube, artists = fargs
+    frames = range(0, len(cube))
+
+    if jobs > 1:
+        # Every worker creates its own figure
+        plt.close(fig)
+        render_parallel(setup_figure, animate, frames,
+                        output_path('rainfall.mp4'), jobs=jobs, fps=5,
+                        replay=True)
+        return
+
     ani_object = FuncAnimation(fig=fig,
                                func=animate,
-                               frames=range(0, 1380),
-                               fargs=(ax, ax2, sub, df, max_rain),
+                               init_func=lambda: artists,
+                               frames=frames,
+                               fargs=fargs,
                                repeat=False,
+                               blit=blit,
                                interval=1)
 
     # norm = matplotlib.colors.Normalize(vmin=0, vmax=1)
@@ -208,4 +313,4 @@ def run():
     writer = ffmpeg(metadata=dict(artist='Me'))
 
     # plt.show()
-    ani_object.save('rainfall.mp4', writer=writer)
+    ani_object.save(output_path('rainfall.mp4'), writer=writer)
@@ -5,6 +5,7 @@
 
 import yaml
 
+from helpers.output import show
 from india.models import *
 
 
@@ -17,7 +18,7 @@ def map_data(states: Dict[str, State], ax: plt.Axes = None):
 
 
 def prepare_map():
-    with open("india/states.yml") as f:
+    with open(META_FILE) as f:
         meta = yaml.load(f, Loader=yaml.SafeLoader)
 
     plt.figure(figsize=(10, 8))
@@ -25,7 +26,7 @@ def prepare_map():
     sts = mp.generate_states(meta)
     map_data(sts, mp.ax)
     mp.draw()
-    plt.show()
+    show()
 
 
 def run():
@@ -7,11 +7,8 @@
 #  Country names were found from BBT subtitle files and then saved in
 #  "bbt.countries" file.
 
-import re
-
 import cartopy.crs as crs
 import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
 import matplotlib
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -19,6 +16,11 @@ from SecretColors import Palette
 from SecretColors.cmaps import BrewerMap
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 
+from helpers.codes import get_resolver
+from helpers.choropleth import choropleth
+from helpers.mentions import MentionCounter, count_files
+from helpers.output import output_path, show
+
 p = Palette("brewer")
 colors = [
     p.blue(shade=30),
@@ -49,20 +51,25 @@ cm = BrewerMap(matplotlib).from_list(colors)
 complex_pattern = ["chad", "oman", "cuba", "france", "mali", "peru"]
 
 
-def country_count(name, text):
-    if name not in complex_pattern:
-        counts = re.findall(f"\\b{name}?\\w+\\b", text)
-    else:
-        counts = re.findall(f"\\b{name}\\b", text)
+# Lot of times, cast used America instead US
+aliases = {"united states": ["america"]}
+
 
-    # Lot of times, cast used America instead US
-    if name == "united states":
-        counts2 = re.findall(f"\\bamerica?\\w+\\b", text)
-        counts.extend(counts2)
-    return len(counts)
+def mention_counter(data: dict) -> MentionCounter:
+    # All the countries are counted with a single pass over the text
+    names = {code: [name] + aliases.get(name, [])
+             for code, name in data.items()}
+    return MentionCounter(names, exact=complex_pattern)
 
 
-def generate_data():
+def generate_data(files=None, jobs: int = None):
+    """
+    Regenerates bbt.countries with count of mentions
+
+    :param files: Subtitle files (SRT or plain text). By default test.txt,
+        which is a file containing all the text gathered from subtitles
+    :param jobs: Number of processes used to count the files
+    """
     # bbt.countries file was generated by just searching substrings,
     # then some manual data cleaning was done
     df = pd.read_csv("data/bbt.countries")
@@ -70,50 +77,36 @@ def generate_data():
     # Add known country variant
     data["GB"] = "british"
 
-    # Test.txt is file containing all the text gathered from subtitles
-    with open("test.txt") as f:
-        text = f.readlines()
-
-    text = " ".join(text)
+    if files is None:
+        files = ["test.txt"]
+    # Files are streamed in chunks, so whole catalogs of subtitles can be
+    # counted without keeping them in memory
+    counts = count_files(mention_counter(data), files, jobs=jobs)
 
-    # File which has mapping of 2 letter country code to 3 letters
-    cc_codes = pd.read_csv("data/codes.csv")
-    cc_codes = dict(zip(cc_codes["code2"], cc_codes["code3"]))
+    # Resolver also knows mapping of 2 letter country code to 3 letters
+    cc_codes = get_resolver()
 
     # Regenerate bb.countries with correct count data
     with open("bbt.countries", "w") as f:
         print("code,name,count", file=f)
         for code, name in data.items():
-            ct = country_count(name, text)
-            print(f"{cc_codes[code.strip()]},{name},{ct}", file=f)
+            print(f"{cc_codes.resolve(code)},{name},{counts[code]}", file=f)
 
 
 def draw_map():
     # Generate counts before drawing the map
     df = pd.read_csv("data/bbt.countries")
-    data = dict(zip(df["code"], df["name"]))
     counts = dict(zip(df["code"], df["count"]))
 
     fig = plt.figure(figsize=(13, 9))
     ax = plt.subplot(111, projection=crs.Miller())
 
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = reader.records()
     # ax.add_feature(cfeature.OCEAN, color=p.blue(shade=30))
     ax.add_feature(cfeature.BORDERS, alpha=0.5)
     ax.add_feature(cfeature.COASTLINE, alpha=0.5)
     max_count = max(counts.values())
     counts = {x: counts[x] / max_count for x in counts}
-    for country in countries:
-        ct = country.attributes['ADM0_A3']
-        if ct in data:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=cm(counts[ct]),
-                              alpha=0.8)
+    choropleth(ax, counts, cmap=cm, alpha=0.8)
 
     divider = make_axes_locatable(ax)
     ax_cb = divider.new_horizontal(size="3%", pad=0.2, axes_class=plt.Axes)
@@ -135,8 +128,8 @@ def draw_map():
     ax.set_title("Number of times country is referred in the "
                  "Big Bang Theory",
                  fontsize=12)
-    plt.savefig("plot.png", dpi=300)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=300)
+    show()
 
 
 def run():
@@ -8,43 +8,28 @@
 
 import cartopy.crs as crs
 import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
 import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
 import numpy as np
 from SecretColors import Palette
 from shapely.geometry import Point
 
-palette = Palette()
-
+from helpers.clip import add_clipped_feature
+from helpers.extremes import country_extremes
+from helpers.functions import get_shapes
+from helpers.geodesic import circle, distance
+from helpers.output import output_path, show
+from helpers.spatial import country_index
 
-def __extract(points, index):
-    p_min, p_max = None, None
-    for p in points:
-        if p_min is None:
-            p_min = p
-        if p_max is None:
-            p_max = p
-        if p_min[index] <= p[index]:
-            p_min = p
-        elif p_max[index] >= p[index]:
-            p_max = p
-    return p_min, p_max
+palette = Palette()
 
 
 def extreme_points(name: str):
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = reader.records()
-    for country in countries:
-        ct = country.attributes['ADM0_A3']
-        if ct == name:
-            points = country.geometry.boundary.coords
-            x_min, x_max = __extract(points, 0)
-            y_min, y_max = __extract(points, 1)
-            return x_min, y_min, x_max, y_max
+    # Westernmost, easternmost, southernmost and northernmost points,
+    # e.g. result["north_lon"], result["north_lat"]
+    country = get_shapes().get(name)
+    if country is not None:
+        return country_extremes().loc[country.attributes["ADM0_A3"]]
 
 
 def compute_radius(ortho, lat, lon, radius_degrees):
@@ -53,17 +38,34 @@ def compute_radius(ortho, lat, lon, radius_degrees):
     return abs(y1)
 
 
-def india_seul():
-    xmin, ymin, xmax, ymax = extreme_points("IND")
-    lat = xmin[1]
-    lon = xmin[0]
-    r = (ymin[1] - ymax[1])
+def india_span(india):
+    # North-south span of India in km (along the meridian of Kibithoo)
+    return distance(india["east_lon"], india["north_lat"],
+                    india["east_lon"], india["south_lat"],
+                    method="vincenty")
 
-    cape = (ymax[0], ymax[1])
+
+def countries_in_span():
+    # Countries which lie (at least partially) within the span of India
+    # from Kibithoo
+    india = extreme_points("IND")
+    return country_index().within(india["east_lon"], india["east_lat"],
+                                  india_span(india), method="vincenty")
+
+
+def india_seul():
+    india = extreme_points("IND")
+    # Easternmost point (Kibithoo) is the center
+    lat = india["east_lat"]
+    lon = india["east_lon"]
+    # North-south span of India (in degrees and in km)
+    r = india["north_lat"] - india["south_lat"]
+    span = india_span(india)
+
+    cape = (india["south_lon"], india["south_lat"])
     seul = (126.58, 37.34)
 
     proj = crs.Orthographic(central_longitude=lon, central_latitude=lat)
-    r_ortho = compute_radius(proj, lat, lon, r)
     r_center = compute_radius(proj, lat, lon, 0.5)
     pad_radius = compute_radius(proj, lat, lon, r + 10)
     width = 800
@@ -74,19 +76,22 @@ def india_seul():
     ax.set_xlim([-pad_radius, pad_radius])
     ax.set_ylim([-pad_radius, pad_radius])
 
-    ax.add_feature(cfeature.LAND)
-    ax.add_feature(cfeature.BORDERS)
-    ax.add_feature(cfeature.COASTLINE)
-    ax.add_feature(cfeature.OCEAN)
+    # Only the part of the world visible in the window is projected
+    add_clipped_feature(ax, cfeature.LAND)
+    add_clipped_feature(ax, cfeature.BORDERS)
+    add_clipped_feature(ax, cfeature.COASTLINE)
+    add_clipped_feature(ax, cfeature.OCEAN)
 
     ax.add_patch(
         mpatches.Circle(xy=(lon, lat), radius=r_center,
                         color=palette.red(), transform=proj,
                         zorder=40))
+    # True geodesic circle: every point is at the same distance from center
+    circle_lon, circle_lat = circle(lon, lat, span, method="vincenty")
     ax.add_patch(
-        mpatches.Circle(xy=(lon, lat), radius=r_ortho, alpha=0.3,
-                        color=palette.red(shade=40),
-                        transform=proj, zorder=30))
+        mpatches.Polygon(np.column_stack([circle_lon, circle_lat]),
+                         alpha=0.3, color=palette.red(shade=40),
+                         transform=crs.Geodetic(), zorder=30))
 
     ax.add_patch(
         mpatches.Circle(xy=seul, radius=0.5,
@@ -113,8 +118,8 @@ def india_seul():
 
     ax.gridlines(color=palette.blue(shade=30), zorder=1)
     plt.tight_layout()
-    plt.savefig("plot.png")
-    plt.show()
+    plt.savefig(output_path("plot.png"))
+    show()
 
 
 def run():
@@ -4,32 +4,31 @@
 #
 #  Data Source: https://data.worldbank.org/indicator/NY.GDP.MKTP.CD
 
-import csv
-
 import cartopy.crs as crs
 import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
 import matplotlib
 import matplotlib.pyplot as plt
+import numpy as np
 from SecretColors import Palette
 
+from helpers.choropleth import choropleth
+from helpers.output import output_path, show
+from helpers.worldbank import get_table
+
 matplotlib.rc("font", family="IBM Plex Sans")
 
 p = Palette('brewer')
 
-COL_2019_GDP = 63
-COL_COUNTRY_NAME = 0
-COL_COUNTRY_CODE = 1
+YEAR = 2019
 
 
-def get_data():
+def get_data(year: int = YEAR):
+    table = get_table("data/gdp.csv")
+    values = table.column(year)
     data = []
-    with open("data/gdp.csv") as f:
-        for row in csv.reader(f):
-            if len(row[COL_2019_GDP]) > 0:
-                data.append((row[COL_COUNTRY_NAME],
-                             row[COL_COUNTRY_CODE],
-                             float(row[COL_2019_GDP]) / 1000000000))
+    for name, code, value in zip(table.names, table.codes, values):
+        if not np.isnan(value):
+            data.append((name, code, value / 1000000000))
 
     return data
 
@@ -42,31 +41,17 @@ def draw_map():
     plt.figure(figsize=(11, 9))
     ax = plt.subplot(111, projection=crs.Miller())
 
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = reader.records()
     # ax.add_feature(cfeature.OCEAN, color=p.blue(shade=30))
     ax.add_feature(cfeature.BORDERS, alpha=0.5)
     ax.add_feature(cfeature.COASTLINE, alpha=0.5)
 
-    for country in countries:
-        ct = country.attributes['ADM0_A3']
-        if ct in data.keys():
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.red(shade=40),
-                              alpha=0.8)
-        else:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.gray(shade=20),
-                              alpha=0.8)
+    choropleth(ax, {x: p.red(shade=40) for x in data},
+               missing=p.gray(shade=20),
+               alpha=0.8)
 
     plt.title("Economic inequality in the World")
-    plt.savefig("plot.png", dpi=300)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=300)
+    show()
 
 
 def run():
@@ -7,34 +7,30 @@
 import csv
 import cartopy.crs as crs
 import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
 import matplotlib
 import matplotlib.pyplot as plt
 from SecretColors import Palette
 from matplotlib.patches import Patch
 
+from helpers.codes import get_resolver
+from helpers.choropleth import choropleth
+from helpers.output import output_path, show
+
 matplotlib.rc("font", family="IBM Plex Sans")
 
 p = Palette('brewer')
 
 
-def get_codes():
-    data = {}
-    with open("data/country-codes.csv") as f:
-        for row in csv.reader(f):
-            data[row[0]] = row[2]
-    return data
-
-
 def get_data():
-    codes = get_codes()
+    codes = get_resolver()
     data = {}
     with open("data/happiness_2019.csv")as f:
         next(f)
         for row in csv.reader(f):
             data[row[1]] = float(row[2])
 
-    data = {codes[k]: v for k, v in data.items()}
+    data = {codes.resolve(k): v for k, v in data.items()}
+    data.pop(None, None)
     return data
 
 
@@ -45,33 +41,19 @@ def draw_map():
     plt.figure(figsize=(12, 8))
     ax = plt.subplot(111, projection=crs.Miller())
 
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = reader.records()
     # ax.add_feature(cfeature.OCEAN, color=p.blue(shade=30))
     ax.add_feature(cfeature.BORDERS, alpha=0.5)
     ax.add_feature(cfeature.COASTLINE, alpha=0.5)
 
-    for country in countries:
-        ct = country.attributes['ADM0_A3']
-        if ct in data:
-            if data[ct] > data["IND"]:
-                color = p.ultramarine(shade=30)
-            elif ct == "IND":
-                color = p.red(shade=20)
-            else:
-                color = p.red(shade=40)
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=color,
-                              alpha=0.8)
+    colors = {}
+    for ct in data:
+        if data[ct] > data["IND"]:
+            colors[ct] = p.ultramarine(shade=30)
+        elif ct == "IND":
+            colors[ct] = p.red(shade=20)
         else:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.gray(shade=20),
-                              alpha=0.8)
+            colors[ct] = p.red(shade=40)
+    choropleth(ax, colors, missing=p.gray(shade=20), alpha=0.8)
 
     handles = [
         Patch(fc=p.red(shade=20), label="India"),
@@ -88,8 +70,8 @@ def draw_map():
                  va="top",
                  ha="right")
     plt.tight_layout()
-    plt.savefig("plot.png", dpi=150)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=150)
+    show()
 
 
 def run():
@@ -6,15 +6,17 @@
 #  https://www.who.int/malaria/areas/elimination/malaria-free-countries/en/
 
 import pandas as pd
-import csv
 import cartopy.crs as crs
 import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
 import matplotlib
 import matplotlib.pyplot as plt
 from SecretColors import Palette
 from matplotlib.patches import Patch
 
+from helpers.codes import get_resolver
+from helpers.choropleth import choropleth
+from helpers.output import output_path, show
+
 matplotlib.rc("font", family="IBM Plex Sans")
 
 p = Palette('brewer')
@@ -22,15 +24,11 @@ p = Palette('brewer')
 
 def get_data() -> pd.DataFrame:
     df = pd.read_csv("data/malaria_certified.csv")
-    df = df.set_index("country")
-    countries = pd.read_csv("data/country-codes.csv")
-    countries = countries.set_index("name")
-    df = pd.concat([df, countries], axis=1, join="inner")
     col = "Alpha-3 code"
-    df = df[[col, "certified", "never"]]
-    df = df.rename_axis("country")
-    df = df.reset_index()
-    return df
+    df[col], _ = get_resolver().map(df["country"])
+    df = df.dropna(subset=[col])
+    df = df[["country", col, "certified", "never"]]
+    return df.reset_index(drop=True)
 
 
 def plot_map():
@@ -46,30 +44,14 @@ def plot_map():
 
     ax = plt.subplot(111, projection=crs.Miller())
 
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = reader.records()
     # ax.add_feature(cfeature.OCEAN, color=p.blue(shade=30))
     ax.add_feature(cfeature.BORDERS, alpha=0.5)
     ax.add_feature(cfeature.COASTLINE, alpha=0.5)
 
-    for country in countries:
-        ct = country.attributes['ADM0_A3']
-        if ct in certified.keys():
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.green(shade=30))
-        elif ct in never.keys():
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.green(shade=60))
-        else:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.gray(shade=20),
-                              alpha=0.8)
+    colors = {x: p.green(shade=60) for x in never}
+    colors.update({x: p.green(shade=30) for x in certified})
+    choropleth(ax, colors,
+               missing=matplotlib.colors.to_rgba(p.gray(shade=20), 0.8))
 
     handles = [
         Patch(fc=p.green(shade=60), label="Never existed or vanished\n"
@@ -89,8 +71,8 @@ def plot_map():
                  bbox=dict(facecolor=p.white(), ec="None", alpha=0.8),
                  va="bottom")
     plt.tight_layout()
-    plt.savefig("plot.png", dpi=300)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=300)
+    show()
 
 
 def run():
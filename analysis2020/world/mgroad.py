@@ -3,30 +3,27 @@
 #  Web: https://github.com/WeirdData/GeoAnalysis
 #
 #  Data: https://en.wikipedia.org/wiki/List_of_roads_named_after_Mahatma_Gandhi
-import csv
-
 import cartopy.crs as crs
 import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
 import matplotlib
 import matplotlib.pyplot as plt
 from SecretColors import Palette
 
+from helpers.codes import get_resolver
+from helpers.choropleth import choropleth
+from helpers.output import output_path, show
+
 matplotlib.rc("font", family="IBM Plex Sans")
 
 p = Palette('brewer')
 
 
 def get_data():
-    mapping = {}
-    with open("data/country-codes.csv") as f2:
-        for row in csv.reader(f2):
-            mapping[row[0]] = row[2]
-
+    codes = get_resolver()
     data = []
     with open("data/mgroad") as f:
         for line in f:
-            data.append(mapping[line.strip()])
+            data.append(codes.resolve(line))
 
     return data
 
@@ -38,27 +35,13 @@ def draw_map():
     plt.figure(figsize=(11, 9))
     ax = plt.subplot(111, projection=crs.Miller())
 
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = reader.records()
     # ax.add_feature(cfeature.OCEAN, color=p.blue(shade=30))
     ax.add_feature(cfeature.BORDERS, alpha=0.5)
     ax.add_feature(cfeature.COASTLINE, alpha=0.5)
 
-    for country in countries:
-        ct = country.attributes['ADM0_A3']
-        if ct in data:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.violet(shade=40),
-                              alpha=0.8)
-        else:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.gray(shade=20),
-                              alpha=0.8)
+    choropleth(ax, {x: p.violet(shade=40) for x in data},
+               missing=p.gray(shade=20),
+               alpha=0.8)
 
     plt.title("Countries where at least one road is named after Mahatma "
               "Gandhi")
@@ -68,8 +51,8 @@ def draw_map():
                  xycoords="figure fraction",
                  va="top",
                  ha="right")
-    plt.savefig("plot.png", dpi=300)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=300)
+    show()
 
 
 def run():
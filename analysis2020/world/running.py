@@ -6,77 +6,98 @@
 #  https://www.alltime-athletics.com
 
 
-from collections import Counter, defaultdict
-
 import cartopy.crs as crs
 import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
 import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 from SecretColors import Palette
 from SecretColors.cmaps import TableauMap
-from scipy.stats import gaussian_kde
+
+from helpers.choropleth import choropleth
+from helpers.kde import kde_groups
+from helpers.output import output_path, show
 
 p = Palette()
 color_shades = [20, 30, 40, 50]
 colors = [p.green(shade=x) for x in color_shades]
 cm = TableauMap(matplotlib).from_list(colors)
 
+COL_TIME = "time"
+COL_ATHLETE = "athlete"
+COL_COUNTRY = "country"
+COL_DATE = "date"
+COL_YEAR = "year"
+
+MEN_FILE = "data/running/men_100m.tsv"
+WOMEN_FILE = "data/running/women_100m.tsv"
+
+# Number of records used in the plots
+TOP_RECORDS = 2000
+
+# Rank, time (with optional flags like 'A'), wind, athlete name, country
+# (first all-uppercase 3 letter word), ... , date of the record
+_RECORD = (r"^\s*\S+\s+(?P<time>\d+(?:\.\d+)?)\S*\s+\S+\s+"
+           r"(?P<athlete>.+?)\s+(?P<country>[A-Z]{3})\s.*?"
+           r"(?P<date>\d{1,2}\.\d{1,2}\.\d{4})\s*$")
+
+_RECORDS = {}
+
 
-def get_data(filename):
-    c = 0
-    data = []
-    ctr = Counter()
+def _parse_records(filename) -> pd.DataFrame:
     with open(filename) as f:
-        for line in f:
-            line = line.strip().split(" ")
-            line = [x for x in line if len(x) > 0]
-            time = float(line[1].replace("A", ""))
-            name = ""
-            for k in line[3:]:
-                if k == k.upper() and len(k) == 3:
-                    country = k
-                    break
-                else:
-                    name += f"{k} "
-
-            date = line[-1]
-            name = name.strip()
-            data.append((time, name, country, date))
-            if c < 10:
-                ctr.update({country})
-            if c == 2000:
-                break
-            c += 1
-
-    return data
+        lines = pd.Series(f.read().splitlines(), dtype=object)
+    df = lines.str.extract(_RECORD).dropna().reset_index(drop=True)
+    df[COL_TIME] = df[COL_TIME].astype(float)
+    df[COL_YEAR] = df[COL_DATE].str[-4:].astype(int)
+    df[COL_DATE] = pd.to_datetime(df[COL_DATE], format="%d.%m.%Y",
+                                  errors="coerce")
+    return df[[COL_TIME, COL_ATHLETE, COL_COUNTRY, COL_DATE, COL_YEAR]]
+
+
+def get_data(filename, top: int = None) -> pd.DataFrame:
+    """
+    All-time list of records (in the order of the file). Every file is
+    parsed only once.
+
+    :param filename: Record list from alltime-athletics
+    :param top: Only top N records (default: all)
+    :return: DataFrame with time, athlete, country, date and year columns
+    """
+    if filename not in _RECORDS:
+        _RECORDS[filename] = _parse_records(filename)
+    df = _RECORDS[filename]
+    if top is not None:
+        df = df.head(top)
+    return df
 
 
 def run_time():
     plt.rcParams['axes.facecolor'] = p.gray(shade=10)
     fig = plt.figure(figsize=(10, 7))
     ax1 = fig.add_subplot(1, 1, 1)
-    men_data = get_data("data/running/men_100m.tsv")
-    women_data = get_data("data/running/women_100m.tsv")
-    year_men = [int(x[-1].split(".")[-1]) for x in men_data]
-    year_women = [int(x[-1].split(".")[-1]) for x in women_data]
-    men = [x[0] for x in men_data]
-    women = [x[0] for x in women_data]
+    men_data = get_data(MEN_FILE, TOP_RECORDS)
+    women_data = get_data(WOMEN_FILE, TOP_RECORDS)
+    year_men = men_data[COL_YEAR].to_numpy()
+    year_women = women_data[COL_YEAR].to_numpy()
+    men = men_data[COL_TIME].to_numpy()
+    women = women_data[COL_TIME].to_numpy()
     ax1.hist(men, 30, color=p.cyan(shade=40), label="Men", zorder=3)
     ax1.hist(women, 30, color=p.magenta(shade=40), label="Women", zorder=3)
     ax1.set_xlabel("Record Time (in seconds)")
     ax1.set_ylabel("Frequency")
-    ax1.set_title("Top 2000 world records for 100 m running", pad=20)
+    ax1.set_title(f"Top {TOP_RECORDS} world records for 100 m running",
+                  pad=20)
     ax1.legend(loc='upper center', bbox_to_anchor=(0.65, 0.51),
                fancybox=True, ncol=2)
-    ax1.annotate(f"Fastest Man ({men[0]} s)\n{men_data[0][1]}",
+    ax1.annotate(f"Fastest Man ({men[0]} s)\n{men_data[COL_ATHLETE][0]}",
                  xy=(men[0], 10),
                  xytext=(men[0], 100),
                  ha="left",
                  arrowprops=dict(arrowstyle="->"),
                  zorder=3)
-    ax1.annotate(f"Fastest Women ({women[0]} s)\n{women_data[0][1]}",
+    ax1.annotate(f"Fastest Women ({women[0]} s)\n{women_data[COL_ATHLETE][0]}",
                  xy=(women[0], 10), xytext=(women[0], 100),
                  arrowprops=dict(arrowstyle="->"), ha="center",
                  zorder=3)
@@ -96,11 +117,10 @@ def run_time():
 
     left, bottom, width, height = [0.15, 0.7, 0.15, 0.15]
     ax2 = fig.add_axes([left, bottom, width, height])
-    density_men = gaussian_kde(year_men)
-    density_women = gaussian_kde(year_women)
     xs = np.linspace(min(year_men), max(year_men), 200)
-    ax2.plot(xs, density_men(xs), color=p.cyan())
-    ax2.plot(xs, density_women(xs), color=p.magenta())
+    density_men, density_women = kde_groups([year_men, year_women], xs)
+    ax2.plot(xs, density_men, color=p.cyan())
+    ax2.plot(xs, density_women, color=p.magenta())
     ax2.annotate("Year-wise\nRecords", (0.06, 0.7),
                  xycoords="axes fraction",
                  fontsize=9)
@@ -117,35 +137,23 @@ def run_time():
                        projection=crs.Robinson())
     draw_map(ax3)
 
-    plt.savefig("plot.png", dpi=300)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=300)
+    show()
 
 
 def draw_map(ax):
-    men_data = get_data("data/running/men_100m.tsv")
-    women_data = get_data("data/running/women_100m.tsv")
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = reader.records()
+    men_data = get_data(MEN_FILE, 100)
+    women_data = get_data(WOMEN_FILE, 100)
     # ax.add_feature(cfeature.OCEAN, color=p.blue(shade=30))
     ax.add_feature(cfeature.BORDERS, alpha=0.1)
     ax.add_feature(cfeature.COASTLINE, alpha=0.5)
 
-    data = Counter([(x[1], x[2]) for x in men_data[:100]])
-    data.update([(x[1], x[2]) for x in women_data[:100]])
-    tmp = defaultdict(int)
-    for d in data:
-        tmp[d[1]] += 1
-    data = {x: tmp[x] / max(tmp.values()) for x in tmp}
-    for country in countries:
-        ct = country.attributes['ADM0_A3']
-        if ct in data:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=cm(data[ct]),
-                              alpha=0.8)
+    # Number of athletes of every country in top 100 records
+    athletes = pd.concat([men_data, women_data])
+    athletes = athletes.drop_duplicates([COL_ATHLETE, COL_COUNTRY])
+    tmp = athletes[COL_COUNTRY].value_counts()
+    data = (tmp / tmp.max()).to_dict()
+    choropleth(ax, data, cmap=cm, alpha=0.8)
 
     ax.set_title("Countries with most records", fontsize=9)
 
@@ -7,26 +7,32 @@
 
 import cartopy.crs as crs
 import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from SecretColors import Palette
 
+from helpers.codes import get_resolver
+from helpers.choropleth import choropleth
+from helpers.output import output_path, show
+from helpers.partition import partition, share_groups
+
 p = Palette('brewer')
 
 
-def get_data():
-    df = pd.read_csv("data/tea.csv", header=None,
+DATA_FILE = "data/tea.csv"
+
+# Cumulative shares of the world export used for grouping countries
+SHARES = [70]
+
+_DATA = {}
+
+
+def _read_data(filename):
+    df = pd.read_csv(filename, header=None,
                      names=["No", "Country", "Export(USD)", "Change"])
 
-    df['Country'] = df['Country'].str.lower()
-    df = df.set_index("Country")
-    codes = pd.read_csv('data/country-codes.csv')
-    codes['name'] = codes['name'].str.lower()
-    codes = codes.set_index("name")
-    codes = codes[["Alpha-3 code"]]
-    codes = codes.dropna()
-    df = pd.concat([df, codes], axis=1)
+    df["Alpha-3 code"], _ = get_resolver().map(df["Country"])
     df = df.dropna(subset=["Alpha-3 code", "Export(USD)"])
     df["Export(USD)"] = df["Export(USD)"] \
         .map(lambda x: int(str(x).replace("$", "").replace(",", "")))
@@ -35,6 +41,13 @@ def get_data():
     return c_map
 
 
+def get_data(filename=DATA_FILE):
+    # File is parsed only once, callers get their own copy
+    if filename not in _DATA:
+        _DATA[filename] = _read_data(filename)
+    return dict(_DATA[filename])
+
+
 def draw_map():
     # Generate counts before drawing the map
     counts = get_data()
@@ -42,83 +55,64 @@ def draw_map():
     plt.figure(figsize=(12, 9))
     ax = plt.subplot(111, projection=crs.Miller())
 
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = reader.records()
     # ax.add_feature(cfeature.OCEAN, color=p.blue(shade=30))
     ax.add_feature(cfeature.BORDERS, alpha=0.5)
     ax.add_feature(cfeature.COASTLINE, alpha=0.5)
     max_count = max(counts.values())
     counts = {x: counts[x] / max_count for x in counts}
     cmap = data_calculations()
-    for country in countries:
-        ct = country.attributes['ADM0_A3']
-        if ct in counts:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=cmap[ct],
-                              alpha=0.8)
-        else:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.gray(shade=20),
-                              alpha=0.8)
+    choropleth(ax, {x: cmap[x] for x in counts},
+               missing=p.gray(shade=20),
+               alpha=0.8)
 
     plt.title("70% of the World's Tea Export in 2019")
-    plt.savefig("plot.png", dpi=300)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=300)
+    show()
 
 
-def split_equal(numbers, groups):
-    numbers = sorted(numbers, key=lambda x: x[1], reverse=True)
-    final_groups = [[] for _ in range(groups)]
+def split_equal(numbers, groups, method="lpt"):
+    # numbers: list of (label, value)
+    values = [x[1] for x in numbers]
+    labels = partition(values, groups, method)
     index_group = [[] for _ in range(groups)]
-    max_sum = [0 for _ in range(groups)]
-    while len(numbers) > 0:
-        idx = max_sum.index(min(max_sum))
-        final_groups[idx].append(numbers[0][1])
-        index_group[idx].append(numbers[0][0])
-        max_sum[idx] = sum(final_groups[idx])
-        numbers.pop(0)
-
-    print([sum(x) for x in final_groups])
+    for (label, _), group in zip(numbers, labels):
+        index_group[group].append(label)
+
+    print(np.bincount(labels, weights=values, minlength=groups).tolist())
     return index_group
 
 
-def split_from_top(numbers):
-    final_groups = []
-    labels = []
-    tmp = []
-    tmp_labels = []
-    while len(numbers) > 0:
-        if sum(tmp) >= 70:
-            final_groups.append(tmp)
-            labels.append(tmp_labels)
-            print([round(x, 1) for x in tmp])
-            tmp = []
-            tmp_labels = []
-
-        tmp.append(numbers[0][1])
-        tmp_labels.append(numbers[0][0])
-        numbers.pop(0)
-    final_groups.append(tmp)
-    print([sum(x) for x in final_groups])
-    labels.append(tmp_labels)
+def split_from_top(numbers, thresholds=None):
+    # numbers: list of (label, share in percent)
+    if thresholds is None:
+        thresholds = SHARES
+    values = np.asarray([x[1] for x in numbers], dtype=float)
+    groups = share_groups(values, thresholds)
+    labels = [[] for _ in range(len(thresholds) + 1)]
+    for (label, _), group in zip(numbers, groups):
+        labels[group].append(label)
+
+    print(np.bincount(groups, weights=values,
+                      minlength=len(labels)).tolist())
     return labels
 
 
-def data_calculations():
+def group_colors(groups: int) -> list:
+    # Sequential shades of orange (darkest for the top exporters) for all
+    # the groups except the last one, which has the remaining countries
+    top = groups - 1
+    shades = np.linspace(80 if top > 1 else 40, 40, top)
+    return [p.orange(shade=x) for x in shades] + [p.gray(shade=20)]
+
+
+def data_calculations(thresholds=None):
     data = get_data()
     total = sum(data.values())
     data = [(k, v * 100 / total) for k, v in data.items()]
     data = sorted(data, key=lambda x: x[1], reverse=True)
     # groups = split_equal(data, 2)
-    groups = split_from_top(data)
-    colors = [p.orange(shade=40),
-              p.gray(shade=20),
-              p.green(shade=40)]
+    groups = split_from_top(data, thresholds)
+    colors = group_colors(len(groups))
     color_map = {}
     for i in range(len(groups)):
         for c in groups[i]:
@@ -145,8 +139,8 @@ def plot_top():
     ax = plt.gca()  # type:plt.Axes
     ax.invert_yaxis()
     plt.tight_layout()
-    plt.savefig("plot.png", dpi=300, transparent=True)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=300, transparent=True)
+    show()
 
 
 def run():
@@ -7,63 +7,76 @@
 
 import cartopy.crs as crs
 import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
 import matplotlib
 import matplotlib.animation as animation
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 from SecretColors import Palette
 from SecretColors.cmaps import BrewerMap
 from matplotlib.animation import FuncAnimation
 
+from helpers.choropleth import choropleth, country_shapes, update_colors
+from helpers.output import show
+from helpers.worldbank import get_table
+
+DATA_FILE = "data/unemployment/unemployment.csv"
+
 p = Palette()
 cm = BrewerMap(matplotlib).pu_rd(is_qualitative=True)
 
 
-def draw_map(i, ax, countries):
-    ax.clear()
-    year = i + 2000
-    data = get_data(year)
-    if len(data) == 0:
-        return
-    max_um = max(data.values())
+def init_map(ax, countries):
+    """
+    Creates all the artists only once. Every frame just updates them.
+
+    :param ax: GeoAxes
+    :param countries: Dictionary of country code and geometry
+    :return: Collection of countries, collection of countries without data
+        and year label
+    """
     ax.add_feature(cfeature.OCEAN, color=p.blue(shade=30))
     ax.add_feature(cfeature.BORDERS, alpha=0.5)
     ax.add_feature(cfeature.COASTLINE, alpha=0.5)
+    ax.set_global()
 
-    for country in countries:
-        ct = country.attributes['ADM0_A3']
-        if ct in data.keys():
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=cm(data[ct] / max_um))
-        else:
-            ax.add_geometries([country.geometry], crs.PlateCarree(),
-                              fc=p.gray(shade=20),
-                              ec=p.gray(shade=50),
-                              hatch='\\\\\\',
-                              alpha=0.3)
+    collection = choropleth(ax, {}, missing="none", shapes=countries)
+    # Hatch is a property of whole collection, hence missing countries are
+    # drawn as a separate collection. Its paths are changed on every frame
+    no_data = choropleth(ax, {}, missing=p.gray(shade=20),
+                         shapes=countries,
+                         ec=p.gray(shade=50),
+                         hatch='\\\\\\',
+                         alpha=0.3)
+    no_data.all_paths = list(no_data.get_paths())
+    year = ax.annotate("", (1.01, 1.02),
+                       fontsize=14,
+                       xycoords="axes fraction")
+    return collection, no_data, year
+
+
+def draw_map(i, artists):
+    collection, no_data, label = artists
+    year = i + 2000
+    data = get_data(year)
+    label.set_text(f"{year}")
+    if len(data) == 0:
+        return artists
+    max_um = get_table(DATA_FILE).maximum(year)
 
-    ax.annotate(f"{year}", (1.01, 1.02),
-                fontsize=14,
-                xycoords="axes fraction")
+    update_colors(collection, {x: data[x] / max_um for x in data}, cmap=cm,
+                  missing="none")
+    no_data.set_paths([x for c, x in zip(no_data.codes, no_data.all_paths)
+                       if c not in data])
+    return artists
 
 
 def get_data(year: int):
-    df = pd.read_csv("data/unemployment/unemployment.csv")
-    df = df.fillna(np.inf)
-    data = {x[0]: x[1] for x in zip(df["Country Code"], df[str(year)]) if x[
-        1] != np.inf}
-    return data
+    # File is parsed only once, later calls just slice the year column
+    return get_table(DATA_FILE).year(year)
 
 
-def run():
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    reader = shpreader.Reader(shpfilename)
-    countries = reader.records()
+def run(blit: bool = False):
+    countries = country_shapes()
 
     fig = plt.figure(figsize=(12, 8))
     ax = fig.add_subplot(1, 1, 1, projection=crs.PlateCarree())
@@ -78,16 +91,19 @@ def run():
                         shrink=0.5, extend="both")
     cbar.ax.set_ylabel("% of total labor force")
 
+    artists = init_map(ax, countries)
     ani_object = FuncAnimation(fig=fig,
                                func=draw_map,
+                               init_func=lambda: artists,
                                frames=range(0, 19),
-                               fargs=(ax, countries),
+                               fargs=(artists,),
                                repeat=False,
+                               blit=blit,
                                interval=20)
 
     # plt.title(f"Unemployment in {year} (modeled ILO estimate)", pad=10)
     ffmpeg = animation.writers['ffmpeg']
     writer = ffmpeg(metadata=dict(artist='Me'))
 
-    plt.show()
+    show()
     # ani_object.save('unemployment.mp4', writer=writer)
@@ -14,13 +14,18 @@ from SecretColors import Palette
 from SecretColors.cmaps import BrewerMap
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 
-from helpers.functions import country_codes, get_shapes
+from helpers.codes import get_resolver
+from helpers.choropleth import choropleth
+from helpers.output import output_path, show
 
 
 def get_data():
     df = pd.read_csv("data/basicDrinkingWater.csv")
-    codes = country_codes(df["Location"].to_list())
-    df["Location"] = df["Location"].map(lambda x: codes[x])
+    df["Location"], unresolved = get_resolver().map(df["Location"])
+    if len(unresolved) > 0:
+        print("Following countries could not be resolved and are skipped")
+        print(unresolved)
+        df = df.dropna(subset=["Location"])
     df["First Tooltip"] /= 100
     df = dict(zip(df["Location"], df["First Tooltip"]))
     return df
@@ -35,19 +40,7 @@ def draw_map():
     ax.add_feature(cfeature.BORDERS, alpha=0.5)
     ax.add_feature(cfeature.COASTLINE, alpha=0.5)
     data = get_data()
-    shapes = get_shapes()
-    for country in shapes:
-        ct = country.attributes['ADM0_A3']
-        if ct in data:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=cm(data[ct]),
-                              alpha=0.8)
-        else:
-            ax.add_geometries([country.geometry],
-                              crs.PlateCarree(),
-                              fc=p.gray(shade=30),
-                              alpha=0.8)
+    choropleth(ax, data, cmap=cm, missing=p.gray(shade=30), alpha=0.8)
 
     # Colorbar
     divider = make_axes_locatable(ax)
@@ -70,8 +63,8 @@ def draw_map():
         "Gray: Data not available.\nData: WHO World Health Statistics",
         xy=(1, -0.02), ha="right",
         xycoords="axes fraction", va="top", color=p.gray())
-    plt.savefig("plot.png", dpi=150)
-    plt.show()
+    plt.savefig(output_path("plot.png"), dpi=150)
+    show()
 
 
 def run():
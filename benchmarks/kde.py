@@ -0,0 +1,55 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Compares helpers.kde with scipy.stats.gaussian_kde (speed and largest
+#  difference relative to the peak of the density).
+#  Run from the root of the repository: python -m benchmarks.kde
+
+import time
+
+import numpy as np
+from scipy.stats import gaussian_kde
+
+from helpers.kde import kde, kde_groups
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run():
+    rng = np.random.default_rng(0)
+    points = np.linspace(1950, 2030, 200)
+    print(f"{'samples':>10} {'scipy (s)':>12} {'fft (s)':>12} "
+          f"{'rel. error':>12}")
+    for n in [1000, 10000, 100000, 1000000]:
+        # Years of records: mix of integers and a broad bump
+        samples = np.concatenate([rng.integers(1960, 2021, n // 2),
+                                  rng.normal(2005, 8, n - n // 2)])
+        expected, t1 = _timed(lambda: gaussian_kde(samples)(points))
+        result, t2 = _timed(kde, samples, points)
+        error = np.abs(result - expected).max() / expected.max()
+        print(f"{n:>10} {t1:>12.4f} {t2:>12.4f} {error:>12.2e}")
+
+    groups = [rng.normal(1990 + i, 10, 50000) for i in range(20)]
+    _, t1 = _timed(lambda: [gaussian_kde(x)(points) for x in groups])
+    _, t2 = _timed(kde_groups, groups, points)
+    print(f"{len(groups)} groups: scipy {t1:.4f} s, fft (batched) {t2:.4f} s")
+
+    # Groups of very different scales in one call
+    groups = [rng.normal(0, 0.01, 10000), rng.normal(0, 100, 10000)]
+    points = np.sort(np.concatenate([np.linspace(-0.05, 0.05, 200),
+                                     np.linspace(-400, 400, 200)]))
+    result = kde_groups(groups, points)
+    for x, density in zip(groups, result):
+        expected = gaussian_kde(x)(points)
+        error = np.abs(density - expected).max() / expected.max()
+        print(f"mixed scales, std {np.std(x):>8.2f}: rel. error "
+              f"{error:.2e}")
+
+
+if __name__ == '__main__':
+    run()
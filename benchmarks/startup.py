@@ -0,0 +1,96 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Import time of the CLI entry point and helpers, measured with
+#  `python -X importtime` in a fresh interpreter (median of few runs).
+#  Plotting and shape stack (cartopy, matplotlib, geopandas, pyproj) should
+#  be loaded only when an analysis or a map actually needs it, hence light
+#  modules are also checked for pulling it in.
+#  Run from the root of the repository: python -m benchmarks.startup
+#  Exit status is non-zero when the target is missed.
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target for importing the CLI entry point (main.py)
+CLI_TARGET_MS = 50
+
+REPEATS = 5
+
+HEAVY = ["cartopy", "matplotlib", "geopandas", "pyproj"]
+
+# Modules which should start without the heavy stack
+LIGHT = ["main", "helpers.batch", "helpers.output", "helpers.codes",
+         "helpers.functions", "helpers.mentions", "helpers.partition",
+         "helpers.kde", "helpers.cache", "helpers.shapes",
+         "helpers.worldbank"]
+
+# Modules which need (parts of) it anyway, reported for comparison
+OTHERS = ["helpers.geodesic", "helpers.extremes", "helpers.spatial",
+          "helpers.projection", "helpers.choropleth"]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_time(module: str):
+    """
+    Imports module in a new interpreter
+
+    :return: Cumulative import time of the module (ms) and names of all the
+        modules imported on the way
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Unable to import {module}\n{result.stderr}")
+    total, names = 0, set()
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match is None:
+            continue
+        names.add(match.group(4))
+        if match.group(4) == module and match.group(3) == "":
+            total = int(match.group(2)) / 1000
+    return total, names
+
+
+def heavy_modules(names) -> list:
+    return sorted({x.split(".")[0] for x in names} & set(HEAVY))
+
+
+def run() -> int:
+    failed = False
+    print(f"{'module':<22} {'import (ms)':>12}  heavy dependencies")
+    for module in LIGHT + OTHERS:
+        times, names = [], set()
+        for _ in range(REPEATS):
+            t, names = import_time(module)
+            times.append(t)
+        heavy = heavy_modules(names)
+        note = ", ".join(heavy) if heavy else "-"
+        if module in LIGHT and heavy:
+            note += "  <- should be lazy"
+            failed = True
+        print(f"{module:<22} {statistics.median(times):>12.1f}  {note}")
+        if module == "main" and statistics.median(times) > CLI_TARGET_MS:
+            print(f"main.py misses the target of {CLI_TARGET_MS} ms")
+            failed = True
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", "--list"], cwd=ROOT,
+                   capture_output=True, check=True)
+    print(f"'python main.py --list' (whole process): "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,79 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Headless batch runner. Every analysis is imported and run in a worker
+#  process with Agg backend and its own output folder (see helpers.output).
+#  Analyses are independent, hence they are simply spread over a process
+#  pool. Failure of one analysis does not stop the others.
+
+import importlib
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, NamedTuple
+
+# Analyses of India import `india.models`, hence this folder is needed on
+# the path
+EXTRA_PATHS = [os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "analysis2020")]
+
+
+class JobResult(NamedTuple):
+    name: str
+    output: str
+    seconds: float
+    error: str = None
+
+
+def run_job(name: str, module: str, directory: str) -> JobResult:
+    """
+    Runs `module.run()` headless and writes its output in given folder
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from helpers.output import set_output
+
+    for path in EXTRA_PATHS:
+        if path not in sys.path:
+            sys.path.append(path)
+
+    output = os.path.join(directory, name)
+    set_output(output)
+    start = time.perf_counter()
+    error = None
+    try:
+        importlib.import_module(module).run()
+    except Exception:
+        error = traceback.format_exc()
+    finally:
+        plt.close("all")
+        set_output(None)
+    return JobResult(name, output, time.perf_counter() - start, error)
+
+
+def run_batch(analyses: Dict[str, str], directory: str,
+              jobs: int = None) -> List[JobResult]:
+    """
+    Runs all the analyses in a process pool
+
+    :param analyses: Dictionary of name and module (which has `run()`)
+    :param directory: Output folder. Every analysis writes into its own
+        sub-folder
+    :param jobs: Number of processes (default: number of CPUs)
+    :return: Results in order of completion
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_job, name, module, directory)
+                   for name, module in analyses.items()]
+        for future in as_completed(futures):
+            result = future.result()
+            status = "failed" if result.error else "ok"
+            print(f"{result.name:<20} {status:<8} {result.seconds:8.2f} s  "
+                  f"{result.output}", flush=True)
+            results.append(result)
+    return results
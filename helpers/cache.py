@@ -0,0 +1,145 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  On-disk cache for shape files. Every source file is converted once to
+#  GeoParquet (geometry as WKB) and later runs load it from there. Cache
+#  entries are keyed by the path, modification time and size of the source
+#  file, so they get refreshed automatically when the shape file changes.
+
+import hashlib
+import importlib.util
+import os
+import re
+import warnings
+
+# geopandas (and pyarrow) are imported only when cache is actually read or
+# written, so that modules which merely need the cache location stay light
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+# Location of the cache can be changed with environment variable
+CACHE_DIR = os.environ.get("GEOANALYSIS_CACHE", "data/cache")
+
+
+def source_key(filename: str, *extra) -> str:
+    """
+    Generates cache key for given source file
+
+    :param filename: Path of the source file
+    :param extra: Any other values which should be part of the key
+    :return: Hex digest which changes whenever source file changes
+    """
+    stat = os.stat(filename)
+    parts = [os.path.abspath(filename), stat.st_mtime_ns, stat.st_size]
+    parts.extend(extra)
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def _source_prefix(filename: str) -> str:
+    # Name of the source file and hash of its folder, so that files with
+    # same name in different folders (e.g. two IND_adm1.shp) do not share
+    # cache entries
+    name = os.path.splitext(os.path.basename(filename))[0]
+    folder = os.path.dirname(os.path.abspath(filename))
+    return f"{name}-{hashlib.sha1(folder.encode()).hexdigest()[:8]}"
+
+
+def cache_path(filename: str, suffix: str, *extra) -> str:
+    """
+    Path of the cache file for given source file
+
+    :param filename: Path of the source file
+    :param suffix: Extension of the cache file
+    :param extra: Any other values which should be part of the key
+    """
+    key = source_key(filename, *extra)
+    return os.path.join(CACHE_DIR, f"{_source_prefix(filename)}-{key}."
+                                   f"{suffix}")
+
+
+def remove_stale(filename: str, current: str, suffix: str):
+    """
+    Removes old cache files of the same source and suffix (written before
+    the source or any other part of the key changed)
+
+    :param filename: Path of the source file
+    :param current: Path of the cache file which should be kept
+    :param suffix: Extension of the cache files
+    """
+    pattern = re.compile(f"{re.escape(_source_prefix(filename))}"
+                         f"-[0-9a-f]{{16}}\\.{re.escape(suffix)}$")
+    for f in os.listdir(CACHE_DIR):
+        f = os.path.join(CACHE_DIR, f)
+        if pattern.match(os.path.basename(f)) and f != current:
+            try:
+                os.remove(f)
+            except OSError:
+                pass
+
+
+def prune(prefix: str, limit: int):
+    """
+    Keeps only the `limit` most recently used cache files whose name starts
+    with given prefix. Readers should touch the files they use (see
+    `touch`), so that modification time tells the last use.
+    """
+    try:
+        files = [os.path.join(CACHE_DIR, x) for x in os.listdir(CACHE_DIR)
+                 if x.startswith(prefix)]
+        files.sort(key=os.path.getmtime, reverse=True)
+    except OSError:
+        return
+    for f in files[limit:]:
+        try:
+            os.remove(f)
+        except OSError:
+            pass
+
+
+def touch(filename: str):
+    """
+    Marks cache file as recently used
+    """
+    try:
+        os.utime(filename)
+    except OSError:
+        pass
+
+
+def write_atomic(df: "geopandas.GeoDataFrame", path: str):
+    """
+    Writes GeoDataFrame to parquet file such that concurrent readers never
+    see a half written file
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+
+
+def read_shapefile(filename: str) -> "geopandas.GeoDataFrame":
+    """
+    Drop-in replacement of `geopandas.read_file` for shape files which uses
+    the on-disk cache
+
+    :param filename: Path of the shape file
+    :return: GeoDataFrame
+    """
+    import geopandas
+
+    if not HAS_PYARROW:
+        warnings.warn("pyarrow is not installed. Shape file cache is "
+                      "disabled.")
+        return geopandas.read_file(filename)
+
+    cached = cache_path(filename, "parquet")
+    if os.path.isfile(cached):
+        return geopandas.read_parquet(cached)
+
+    df = geopandas.read_file(filename)
+    try:
+        write_atomic(df, cached)
+        remove_stale(filename, cached, "parquet")
+    except OSError as e:
+        warnings.warn(f"Unable to write shape file cache: {e}")
+    return df
@@ -0,0 +1,162 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Batched choropleth renderer. Instead of adding one FeatureArtist per
+#  country (`ax.add_geometries([geometry], ...)`), all geometries are
+#  projected in a single pass and added as one PathCollection with an array
+#  of face colors. Projected geometries are cached (see helpers.projection)
+#  and paths are drawn with the native transform of the axes.
+
+from typing import Dict, List
+
+import cartopy.crs as crs
+import matplotlib.colors as mcolors
+import numpy as np
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+
+from helpers.clip import clip_to_extent, visible_extent
+from helpers.lod import simplify, tolerance_for_axes
+from helpers.projection import project_geometries
+from helpers.shapes import get_countries
+
+try:
+    from cartopy.mpl.path import shapely_to_path
+except ImportError:
+    # Older cartopy versions
+    from cartopy.mpl.patch import geos_to_path
+
+
+    def shapely_to_path(geometry) -> Path:
+        paths = geos_to_path(geometry)
+        if len(paths) == 0:
+            return Path(np.empty((0, 2)))
+        return Path.make_compound_path(*paths)
+
+
+def country_shapes(resolution: str = "110m",
+                   key: str = "ADM0_A3") -> Dict[str, object]:
+    """
+    Dictionary of country code and geometry from the country store
+    """
+    return {x.attributes[key]: x.geometry for x in get_countries(resolution)}
+
+
+def project_paths(geometries: List, projection: crs.Projection,
+                  src_crs: crs.CRS = None) -> List[Path]:
+    """
+    Projects all geometries and converts them to matplotlib paths
+
+    :param geometries: List of shapely geometries
+    :param projection: Target projection (usually `ax.projection`)
+    :param src_crs: CRS of the geometries (default PlateCarree)
+    :return: List of paths in projection coordinates
+    """
+    projected = project_geometries(geometries, projection, src_crs)
+    return [shapely_to_path(x) for x in projected]
+
+
+def face_colors(codes: List[str], values: Dict[str, object], cmap=None,
+                norm=None, missing=None) -> np.ndarray:
+    """
+    RGBA array for given codes. Arguments are same as of `choropleth`.
+    NaN values are treated as missing. If missing is None, such codes get
+    fully transparent color.
+    """
+    colors = np.zeros((len(codes), 4))
+    known = np.array([x in values for x in codes], dtype=bool)
+    if known.any():
+        data = [values[x] for x, k in zip(codes, known) if k]
+        if cmap is None:
+            colors[known] = mcolors.to_rgba_array(data)
+        else:
+            data = np.asarray(data, dtype=float)
+            nan = np.isnan(data)
+            if norm is not None:
+                data = norm(data)
+            colors[known] = cmap(data)
+            known[np.flatnonzero(known)[nan]] = False
+    if missing is not None and (~known).any():
+        colors[~known] = mcolors.to_rgba(missing)
+    return colors
+
+
+def update_colors(collection: PathCollection, values: Dict[str, object],
+                  cmap=None, norm=None, missing=None) -> PathCollection:
+    """
+    Updates face colors of a collection returned by `choropleth`. Nothing
+    is projected again, hence this is what animations should call on every
+    frame.
+    """
+    collection.set_facecolor(face_colors(collection.codes, values, cmap,
+                                         norm, missing))
+    return collection
+
+
+def choropleth(ax, values: Dict[str, object], cmap=None, norm=None,
+               missing=None, shapes: Dict[str, object] = None,
+               edges: Dict[str, object] = None, src_crs: crs.CRS = None,
+               lod: bool = True, clip: bool = True,
+               **kwargs) -> PathCollection:
+    """
+    Draws all the shapes as a single PathCollection
+
+    :param ax: GeoAxes on which map should be drawn
+    :param values: Dictionary of code and value. If cmap is None, values
+        are considered as colors
+    :param cmap: Colormap used for the values
+    :param norm: Normalization applied before cmap. If None, values should
+        already be in [0, 1]
+    :param missing: Color of the shapes which are not in values. If None,
+        they are not drawn. Use "none" to keep invisible placeholders which
+        can be colored later with `update_colors`
+    :param shapes: Dictionary of code and geometry. Defaults to Natural
+        Earth countries keyed by ADM0_A3 code
+    :param edges: Dictionary of code and edge color. Codes which are not in
+        it get no edge. Use this instead of a list of `edgecolors` in
+        kwargs, because shapes outside the extent and those without values
+        are dropped, which would shift such lists onto other shapes
+    :param src_crs: CRS of the shapes (default PlateCarree)
+    :param lod: If True, geometries are simplified according to the
+        current extent and size of the axes (see `helpers.lod`). Hence,
+        extent should be set before calling this function
+    :param clip: If True, shapes outside the current extent are dropped and
+        partially visible ones are clipped before projection (see
+        `helpers.clip`)
+    :param kwargs: Passed to PathCollection (e.g. alpha, ec, lw, hatch).
+        These apply to the whole collection
+    :return: PathCollection added to the axes. Its `codes` attribute has
+        codes in the same order as the paths (shapes outside the extent are
+        not part of it)
+    """
+    if shapes is None:
+        shapes = country_shapes()
+
+    # Whole layer is prepared (and cached) irrespective of the values, so
+    # that all the maps with same layer and view share it
+    codes = list(shapes)
+    geometries = [shapes[x] for x in codes]
+    if src_crs is None or src_crs == crs.PlateCarree():
+        # Whole layer is simplified before clipping, so that the simplified
+        # layer (cached on disk) is same for every extent
+        if lod:
+            geometries = simplify(geometries, tolerance_for_axes(ax))
+        if clip:
+            keep, geometries = clip_to_extent(geometries, visible_extent(ax))
+            codes = [codes[i] for i in keep]
+    projected = project_geometries(geometries, ax.projection, src_crs)
+
+    selected = [i for i, x in enumerate(codes)
+                if x in values or missing is not None]
+    codes = [codes[i] for i in selected]
+    paths = [shapely_to_path(projected[i]) for i in selected]
+    colors = face_colors(codes, values, cmap, norm, missing)
+    if edges is not None:
+        kwargs["edgecolors"] = face_colors(codes, edges)
+    kwargs.setdefault("zorder", 1.5)
+    collection = PathCollection(paths, facecolors=colors,
+                                transform=ax.transData, **kwargs)
+    collection.codes = codes
+    ax.add_collection(collection, autolim=False)
+    return collection
@@ -0,0 +1,105 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Extent aware clipping. Regional maps (India, orthographic windows) should
+#  not pay for projecting the whole planet. Geometries outside the viewport
+#  are dropped using a spatial index and partially visible ones are clipped
+#  to (slightly padded) viewport before they are projected. Results are
+#  cached per layer and extent.
+
+from typing import List, Tuple
+
+import cartopy.crs as crs
+import cartopy.feature as cfeature
+import geopandas
+import numpy as np
+from shapely.geometry import box
+
+from helpers.lod import layer_key
+
+# Extra area around the extent (as a fraction of its size) so that edges
+# of clipped geometries never show up inside the view
+MARGIN = 0.02
+
+WORLD = (-180.0, 180.0, -90.0, 90.0)
+
+_CLIPPED = {}
+_FEATURES = {}
+
+
+def _padded(extent) -> Tuple[float, float, float, float]:
+    x0, x1, y0, y1 = extent
+    dx = abs(x1 - x0) * MARGIN
+    dy = abs(y1 - y0) * MARGIN
+    return (max(min(x0, x1) - dx, WORLD[0]), min(max(x0, x1) + dx, WORLD[1]),
+            max(min(y0, y1) - dy, WORLD[2]), min(max(y0, y1) + dy, WORLD[3]))
+
+
+def is_global(extent) -> bool:
+    x0, x1, y0, y1 = _padded(extent)
+    return (x0, x1, y0, y1) == WORLD
+
+
+def clip_to_extent(geometries: List, extent) -> Tuple[np.ndarray, List]:
+    """
+    Drops geometries outside the extent and clips partially visible ones
+
+    :param geometries: List of shapely geometries (in PlateCarree)
+    :param extent: [x0, x1, y0, y1] in degrees
+    :return: Indices of the geometries which are kept and the clipped
+        geometries (in the same order as indices)
+    """
+    if is_global(extent):
+        return np.arange(len(geometries)), list(geometries)
+
+    x0, x1, y0, y1 = _padded(extent)
+    key = (layer_key(geometries), (x0, x1, y0, y1))
+    if key in _CLIPPED:
+        return _CLIPPED[key]
+
+    series = geopandas.GeoSeries(list(geometries))
+    view = box(x0, y0, x1, y1)
+    index = np.sort(series.sindex.query(view, predicate="intersects"))
+    visible = series.iloc[index]
+    inside = visible.within(view).to_numpy()
+    clipped = visible.clip_by_rect(x0, y0, x1, y1).to_numpy()
+    # Fully visible geometries are kept as they are
+    clipped[inside] = visible.to_numpy()[inside]
+    _CLIPPED[key] = (index, list(clipped))
+    return _CLIPPED[key]
+
+
+def visible_extent(ax) -> Tuple[float, float, float, float]:
+    """
+    Current extent of the GeoAxes in PlateCarree
+    """
+    return tuple(ax.get_extent(crs.PlateCarree()))
+
+
+def clipped_feature(feature: cfeature.Feature,
+                    extent) -> cfeature.ShapelyFeature:
+    """
+    Copy of a cartopy feature (e.g. cfeature.BORDERS) which only has
+    geometries clipped to the given extent
+    """
+    x0, x1, y0, y1 = _padded(extent)
+    key = (id(feature), (x0, x1, y0, y1))
+    if key not in _FEATURES:
+        geometries = list(feature.intersecting_geometries([x0, x1, y0, y1]))
+        _, geometries = clip_to_extent(geometries, extent)
+        geometries = [x for x in geometries if not x.is_empty]
+        _FEATURES[key] = cfeature.ShapelyFeature(geometries, feature.crs,
+                                                 **feature.kwargs)
+    return _FEATURES[key]
+
+
+def add_clipped_feature(ax, feature: cfeature.Feature, **kwargs):
+    """
+    Same as `ax.add_feature` but only geometries inside the current extent
+    are added. Extent should be set before calling this.
+    """
+    extent = visible_extent(ax)
+    if is_global(extent):
+        return ax.add_feature(feature, **kwargs)
+    return ax.add_feature(clipped_feature(feature, extent), **kwargs)
@@ -0,0 +1,116 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Country name and code resolution. All code tables are loaded only once
+#  and merged into a single hash index which maps country names, ISO
+#  alpha-2 and alpha-3 codes to alpha-3 code.
+
+import os
+import warnings
+from typing import List, Tuple
+
+import pandas as pd
+
+SYNONYM_FILE = os.path.join(os.path.dirname(__file__),
+                            "synonym_countries.csv")
+# Following tables are optional as data folder is not part of the repo
+COUNTRY_CODES_FILE = "data/country-codes.csv"
+CODES_FILE = "data/codes.csv"
+
+_RESOLVER = None
+
+
+def _key(value) -> str:
+    return str(value).strip().lower()
+
+
+class CodeResolver:
+    """
+    Resolves country names and codes to ISO alpha-3 code
+
+    Tables are used in order of their priority i.e. if same name is
+    present in multiple tables, one from the first table is used. ISO table
+    (country-codes.csv) comes first, synonyms only add other spellings.
+    Names which map to different codes in different tables are reported
+    with a warning.
+    """
+
+    def __init__(self, synonym_file: str = SYNONYM_FILE,
+                 country_codes_file: str = COUNTRY_CODES_FILE,
+                 codes_file: str = CODES_FILE):
+        self._names = {}
+        self._codes = {}
+
+        if os.path.isfile(country_codes_file):
+            # "NA" is alpha-2 code of Namibia
+            df = pd.read_csv(country_codes_file, keep_default_na=False,
+                             na_values=[""])
+            df = df.dropna(subset=["Alpha-3 code"])
+            self._add(self._names, df["name"], df["Alpha-3 code"],
+                      country_codes_file)
+            self._add(self._codes, df["Alpha-3 code"], df["Alpha-3 code"],
+                      country_codes_file)
+            if "Alpha-2 code" in df.columns:
+                self._add(self._codes, df["Alpha-2 code"],
+                          df["Alpha-3 code"], country_codes_file)
+
+        df = pd.read_csv(synonym_file)
+        self._add(self._names, df["name"], df["code"], synonym_file)
+        self._add(self._codes, df["code"], df["code"], synonym_file)
+
+        if os.path.isfile(codes_file):
+            df = pd.read_csv(codes_file, keep_default_na=False,
+                             na_values=[""])
+            self._add(self._codes, df["code2"], df["code3"], codes_file)
+            self._add(self._codes, df["code3"], df["code3"], codes_file)
+
+    @staticmethod
+    def _add(index: dict, keys: pd.Series, values: pd.Series,
+             source: str = None):
+        conflicts = []
+        for k, v in zip(keys, values):
+            if pd.isna(k) or pd.isna(v):
+                continue
+            key, code = _key(k), str(v).strip().upper()
+            if index.setdefault(key, code) != code:
+                conflicts.append(f"{k} ({code}, using {index[key]})")
+        if len(conflicts) > 0:
+            warnings.warn(f"Following entries of {source} conflict with "
+                          f"earlier code tables and are ignored: "
+                          f"{', '.join(conflicts)}")
+
+    def resolve(self, value: str, default=None):
+        """
+        Alpha-3 code of given country name or code
+
+        :param value: Country name, alpha-2 or alpha-3 code
+        :param default: Returned when value can not be resolved
+        """
+        key = _key(value)
+        if key in self._names:
+            return self._names[key]
+        return self._codes.get(key, default)
+
+    def map(self, values: pd.Series) -> Tuple[pd.Series, List[str]]:
+        """
+        Resolves whole series in one call
+
+        :param values: Series of country names or codes
+        :return: Series of alpha-3 codes (NaN where value could not be
+            resolved) and list of unresolved values
+        """
+        keys = values.astype(str).str.strip().str.lower()
+        codes = keys.map(self._names).fillna(keys.map(self._codes))
+        unresolved = values[codes.isna()].drop_duplicates().to_list()
+        return codes, unresolved
+
+
+def get_resolver() -> CodeResolver:
+    """
+    Returns shared code resolver
+    """
+    global _RESOLVER
+    if _RESOLVER is None:
+        _RESOLVER = CodeResolver()
+    return _RESOLVER
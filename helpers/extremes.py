@@ -0,0 +1,73 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Extreme points (westernmost, easternmost, southernmost and northernmost)
+#  of regions. Coordinates of all the parts of all the geometries are taken
+#  at once as a single array and the extremes of every region are found by
+#  sorting, hence MultiPolygons (islands, exclaves) are handled naturally.
+#  Note: Longitudes are used as they are, hence for regions crossing the
+#  antimeridian (e.g. Russia, Fiji) easternmost point is near 180.
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from helpers.shapes import get_countries
+
+COL_CODE = "code"
+DIRECTIONS = ["west", "east", "south", "north"]
+COLUMNS = [f"{d}_{c}" for d in DIRECTIONS for c in ("lon", "lat")]
+
+_COUNTRY_EXTREMES = {}
+
+
+def _last_of_groups(groups: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Position of the largest value in every group (for groups which are
+    # present)
+    order = np.lexsort((values, groups))
+    last = np.append(np.flatnonzero(np.diff(groups[order])), len(order) - 1)
+    return order[last]
+
+
+def extreme_points(codes: Iterable[str],
+                   geometries: Iterable) -> pd.DataFrame:
+    """
+    Extreme points of every region. Geometries with the same code (e.g.
+    districts of a state) are treated as a single region.
+
+    :param codes: Code of every geometry
+    :param geometries: Geometries (in lon / lat)
+    :return: DataFrame indexed by code with lon and lat of the extreme point
+        in every direction, e.g. `north_lon`, `north_lat`
+    """
+    geometries = np.asarray(list(geometries), dtype=object)
+    labels, unique = pd.factorize(pd.Series(list(codes), dtype=object))
+    coords, index = shapely.get_coordinates(geometries, return_index=True)
+    regions = labels[index]
+    lon, lat = coords[:, 0], coords[:, 1]
+
+    df = pd.DataFrame(np.nan, index=pd.Index(unique, name=COL_CODE),
+                      columns=COLUMNS)
+    if len(coords) == 0:
+        return df
+    for direction, values in zip(DIRECTIONS, [-lon, lon, -lat, lat]):
+        picked = _last_of_groups(regions, values)
+        rows = regions[picked]
+        df.iloc[rows, df.columns.get_loc(f"{direction}_lon")] = lon[picked]
+        df.iloc[rows, df.columns.get_loc(f"{direction}_lat")] = lat[picked]
+    return df
+
+
+def country_extremes(resolution: str = "110m") -> pd.DataFrame:
+    """
+    Shared table of extreme points of all Natural Earth countries (indexed
+    by ADM0_A3)
+    """
+    if resolution not in _COUNTRY_EXTREMES:
+        countries = get_countries(resolution)
+        _COUNTRY_EXTREMES[resolution] = extreme_points(
+            countries.codes, [x.geometry for x in countries])
+    return _COUNTRY_EXTREMES[resolution]
@@ -5,29 +5,27 @@
 #  Helper functions to get around the conversions
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import cartopy.crs as crs
-import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
-import matplotlib
-import matplotlib.pyplot as plt
+
+from helpers.codes import get_resolver
 
 
 def country_codes(country_lists):
-    df = pd.read_csv("helpers/synonym_countries.csv")
-    df_2 = df["name"].to_list()
-    new_con = [x for x in country_lists if x not in df_2]
+    # For large tables, use get_resolver().map(...) directly which does not
+    # raise but reports unresolved names
+    codes, new_con = get_resolver().map(pd.Series(country_lists,
+                                                  dtype=object))
     if len(new_con) > 0:
         print("Following new countries found")
         print(new_con)
         raise Exception("Please resolve new countries before proceeding")
 
-    df = dict(zip(df["name"], df["code"]))
-    return {x: df[x] for x in country_lists}
+    return dict(zip(country_lists, codes))
 
 
-def get_shapes():
-    shpfilename = shpreader.natural_earth(resolution='110m',
-                                          category='cultural',
-                                          name='admin_0_countries')
-    return shpreader.Reader(shpfilename).records()
+def get_shapes(resolution: str = "110m"):
+    # Shapefile is parsed only once per process. Returned store
+    # (helpers.shapes.CountryStore) can be iterated multiple times and also
+    # supports lookup by country codes. Shape stack (cartopy, geopandas) is
+    # loaded on first call, country_codes does not need it.
+    from helpers.shapes import get_countries
+    return get_countries(resolution)
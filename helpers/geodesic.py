@@ -0,0 +1,290 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Vectorized geodesic distances. All functions take arrays of lon / lat (in
+#  degrees, broadcast like numpy) and return kilometers.
+#
+#  haversine : Great circle on a sphere with mean Earth radius. Fastest,
+#              error up to ~0.5%
+#  vincenty  : Vincenty's inverse formula on WGS84 ellipsoid (iterative,
+#              sub-millimeter). Nearly antipodal points where it does not
+#              converge are solved with Karney's method
+#  karney    : Karney's method on WGS84 ellipsoid (via pyproj, which comes
+#              with cartopy, imported on first use)
+
+from typing import Tuple
+
+import numpy as np
+import shapely
+from shapely.affinity import translate
+from shapely.geometry import box
+
+# Mean Earth radius (IUGG) in km
+EARTH_RADIUS = 6371.0088
+
+# WGS84 ellipsoid (in km)
+WGS84_A = 6378.137
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+# Kilometers in a degree of a great circle
+KM_PER_DEGREE = np.pi * EARTH_RADIUS / 180
+
+# Longitudes of disks are rounded to multiples of 1 / SEAM_GRID degree
+SEAM_GRID = 2 ** 30
+
+# Largest number of pairs computed in one go by distance_matrix
+BATCH_SIZE = 1000000
+
+METHODS = ["haversine", "vincenty", "karney"]
+
+_GEOD = {}
+
+
+def _geod():
+    if "WGS84" not in _GEOD:
+        import pyproj
+        _GEOD["WGS84"] = pyproj.Geod(ellps="WGS84")
+    return _GEOD["WGS84"]
+
+
+def _check_method(method: str):
+    if method not in METHODS:
+        raise ValueError(f"Unknown geodesic method '{method}'. Use one of "
+                         f"{METHODS}")
+
+
+def haversine(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """
+    Great circle distance on a sphere (km)
+    """
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    h = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+def karney(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """
+    Geodesic distance on WGS84 ellipsoid with Karney's method (km)
+    """
+    lon1, lat1, lon2, lat2 = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in (lon1, lat1, lon2, lat2)])
+    _, _, distance = _geod().inv(lon1.ravel(), lat1.ravel(),
+                                 lon2.ravel(), lat2.ravel())
+    return np.asarray(distance).reshape(lon1.shape) / 1000
+
+
+def vincenty(lon1, lat1, lon2, lat2, tolerance: float = 1e-12,
+             max_iterations: int = 200) -> np.ndarray:
+    """
+    Geodesic distance on WGS84 ellipsoid with Vincenty's inverse formula
+    (km). Points where iteration does not converge are given to `karney`.
+    """
+    lon1, lat1, lon2, lat2 = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in (lon1, lat1, lon2, lat2)])
+    shape = lon1.shape
+    lon1, lat1, lon2, lat2 = [x.ravel() for x in (lon1, lat1, lon2, lat2)]
+    f = WGS84_F
+    big_l = np.radians(lon2 - lon1)
+    u1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    u2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+
+    lam = big_l.copy()
+    sin_sigma = np.zeros(len(lam))
+    cos_sigma = np.zeros(len(lam))
+    sigma = np.zeros(len(lam))
+    cos2_alpha = np.zeros(len(lam))
+    cos_2sm = np.zeros(len(lam))
+    # Only points which have not converged yet are iterated
+    active = np.arange(len(lam))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iterations):
+            i = active
+            sin_lam, cos_lam = np.sin(lam[i]), np.cos(lam[i])
+            sin_sigma[i] = np.hypot(cos_u2[i] * sin_lam,
+                                    cos_u1[i] * sin_u2[i] -
+                                    sin_u1[i] * cos_u2[i] * cos_lam)
+            cos_sigma[i] = (sin_u1[i] * sin_u2[i] +
+                            cos_u1[i] * cos_u2[i] * cos_lam)
+            sigma[i] = np.arctan2(sin_sigma[i], cos_sigma[i])
+            sin_alpha = np.where(sin_sigma[i] == 0, 0,
+                                 cos_u1[i] * cos_u2[i] * sin_lam /
+                                 sin_sigma[i])
+            cos2_alpha[i] = 1 - sin_alpha ** 2
+            # Equatorial lines have cos2_alpha = 0
+            cos_2sm[i] = np.where(cos2_alpha[i] == 0, 0,
+                                  cos_sigma[i] - 2 * sin_u1[i] * sin_u2[i] /
+                                  cos2_alpha[i])
+            c = f / 16 * cos2_alpha[i] * (4 + f * (4 - 3 * cos2_alpha[i]))
+            previous = lam[i]
+            lam[i] = big_l[i] + (1 - c) * f * sin_alpha * (
+                    sigma[i] + c * sin_sigma[i] * (
+                        cos_2sm[i] + c * cos_sigma[i] *
+                        (-1 + 2 * cos_2sm[i] ** 2)))
+            active = i[np.abs(lam[i] - previous) > tolerance]
+            if len(active) == 0:
+                break
+
+        u_sq = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (
+                320 - 175 * u_sq)))
+        b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = b * sin_sigma * (cos_2sm + b / 4 * (
+                cos_sigma * (-1 + 2 * cos_2sm ** 2) -
+                b / 6 * cos_2sm * (-3 + 4 * sin_sigma ** 2) *
+                (-3 + 4 * cos_2sm ** 2)))
+        distance = WGS84_B * a * (sigma - delta_sigma)
+
+    failed = np.zeros(len(distance), dtype=bool)
+    failed[active] = True
+    failed |= ~np.isfinite(distance)
+    if failed.any():
+        distance[failed] = karney(lon1[failed], lat1[failed],
+                                  lon2[failed], lat2[failed])
+    return distance.reshape(shape)
+
+
+def distance(lon1, lat1, lon2, lat2, method: str = "haversine"):
+    """
+    Distance between points (km). Arguments are broadcast, e.g. one point
+    against an array of points.
+
+    :param method: "haversine", "vincenty" or "karney"
+    """
+    _check_method(method)
+    return {"haversine": haversine,
+            "vincenty": vincenty,
+            "karney": karney}[method](lon1, lat1, lon2, lat2)
+
+
+def distance_matrix(lon1, lat1, lon2, lat2,
+                    method: str = "haversine") -> np.ndarray:
+    """
+    Distances between every pair of two point sets (km)
+
+    :param lon1: Longitudes of first set (n)
+    :param lat1: Latitudes of first set (n)
+    :param lon2: Longitudes of second set (m)
+    :param lat2: Latitudes of second set (m)
+    :param method: "haversine", "vincenty" or "karney"
+    :return: Matrix of shape (n, m)
+    """
+    _check_method(method)
+    lon1 = np.asarray(lon1, dtype=float).ravel()
+    lat1 = np.asarray(lat1, dtype=float).ravel()
+    lon2 = np.asarray(lon2, dtype=float).ravel()
+    lat2 = np.asarray(lat2, dtype=float).ravel()
+    result = np.empty((len(lon1), len(lon2)))
+    rows = max(1, BATCH_SIZE // max(1, len(lon2)))
+    for start in range(0, len(lon1), rows):
+        end = start + rows
+        result[start:end] = distance(lon1[start:end, None],
+                                     lat1[start:end, None],
+                                     lon2[None, :], lat2[None, :], method)
+    return result
+
+
+def destination(lon, lat, azimuth, dist,
+                method: str = "haversine") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Point reached after travelling given distance from a point
+
+    :param lon: Longitude of the start
+    :param lat: Latitude of the start
+    :param azimuth: Direction in degrees (clockwise from north)
+    :param dist: Distance in km
+    :param method: "haversine" (sphere) or "vincenty" / "karney" (WGS84
+        ellipsoid)
+    :return: Longitudes and latitudes
+    """
+    _check_method(method)
+    lon, lat, azimuth, dist = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in (lon, lat, azimuth, dist)])
+    if method != "haversine":
+        x, y, _ = _geod().fwd(lon.ravel(), lat.ravel(), azimuth.ravel(),
+                              dist.ravel() * 1000)
+        return (np.asarray(x).reshape(lon.shape),
+                np.asarray(y).reshape(lon.shape))
+
+    phi, theta = np.radians(lat), np.radians(azimuth)
+    delta = dist / EARTH_RADIUS
+    phi2 = np.arcsin(np.sin(phi) * np.cos(delta) +
+                     np.cos(phi) * np.sin(delta) * np.cos(theta))
+    lam2 = np.radians(lon) + np.arctan2(
+        np.sin(theta) * np.sin(delta) * np.cos(phi),
+        np.cos(delta) - np.sin(phi) * np.sin(phi2))
+    lon2 = (np.degrees(lam2) + 180) % 360 - 180
+    return lon2, np.degrees(phi2)
+
+
+def circle(lon: float, lat: float, radius: float, points: int = 361,
+           method: str = "haversine") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Geodesic circle (all points at given distance from the center)
+
+    :param lon: Longitude of the center
+    :param lat: Latitude of the center
+    :param radius: Radius in km
+    :param points: Number of points on the circle (first and last are same)
+    :param method: see `destination`
+    :return: Longitudes and latitudes of the circle (counter-clockwise, so
+        it can be directly used as exterior of a polygon)
+    """
+    azimuth = np.linspace(360, 0, points)
+    return destination(lon, lat, azimuth, radius, method)
+
+
+def disk(lon: float, lat: float, radius: float, points: int = 361,
+         method: str = "haversine"):
+    """
+    Geodesic disk as a (Multi)Polygon in lon / lat. Parts crossing the
+    antimeridian are wrapped around and disks containing a pole are closed
+    along it. Edges between the circle points are straight in lon / lat,
+    hence use enough points for large disks.
+
+    :param lon: Longitude of the center
+    :param lat: Latitude of the center
+    :param radius: Radius in km
+    :param points: Number of points on the circle
+    :param method: see `destination`
+    """
+    world = box(-180, -90, 180, 90)
+    # Disk around (almost) whole Earth
+    if radius >= np.pi * EARTH_RADIUS:
+        return world
+    if abs(lat) >= 90:
+        # Azimuth is not defined at a pole, disk is a cap of latitudes
+        _, edge = destination(lon, lat, 180, radius, method)
+        return box(-180, min(edge, lat), 180, max(edge, lat))
+    x, y = circle(lon, lat, radius, points, method)
+    # Continuous longitudes (can go outside -180, 180). They are rounded to
+    # a binary grid (~1e-9 degree), so that copies shifted by 360 degrees
+    # meet exactly and do not leave a crack along the seam
+    x = np.degrees(np.unwrap(np.radians(x)))
+    x = np.round(x * SEAM_GRID) / SEAM_GRID
+    ring = list(zip(x, y))
+    north = distance(lon, lat, 0, 90, method) < radius
+    south = distance(lon, lat, 0, -90, method) < radius
+    if abs(x[-1] - x[0]) > 180:
+        # Circle went around a pole, close the polygon along it. Last point
+        # is the first one, one turn apart
+        x[-1] = x[0] + np.copysign(360, x[-1] - x[0])
+        ring[-1] = (x[-1], y[-1])
+        pole = 90 if north else -90
+        ring += [(x[-1], pole), (x[0], pole)]
+    shape = shapely.make_valid(shapely.Polygon(ring))
+    parts = [translate(shape, dx) for dx in (-360, 0, 360)]
+    shape = shapely.intersection(shapely.union_all(parts), world)
+    # Copies touching at the antimeridian can leave lines behind
+    parts = [x for x in shapely.get_parts(shape)
+             if x.geom_type in ("Polygon", "MultiPolygon")]
+    shape = shapely.union_all(parts)
+    if north and south:
+        # Disk containing both poles: circle encloses the cap around the
+        # antipode in lon / lat, hence disk is the rest of the world
+        shape = world.difference(shape)
+    return shape
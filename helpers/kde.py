@@ -0,0 +1,110 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Gaussian kernel density estimation with binning and FFT. Samples are
+#  linearly binned on a fine regular grid and the binned counts are
+#  convolved with the Gaussian kernel in Fourier space, hence cost does not
+#  depend on (samples x evaluation points). Bandwidth is Scott's rule, same
+#  as `scipy.stats.gaussian_kde`, and the result is numerically close to it
+#  (see benchmarks/kde.py). Many groups (e.g. men / women, events) are
+#  estimated together with a single batched FFT. Every group is binned on
+#  its own range, so groups of very different scales can be mixed.
+
+import math
+import warnings
+from typing import Sequence
+
+import numpy as np
+
+# Number of bins of the internal grid
+BINS = 2048
+
+# Largest spacing of the grid (in bandwidths). More bins are used if a
+# group needs it
+MAX_SPACING = 0.25
+
+# Upper limit on the number of bins
+MAX_BINS = 1 << 20
+
+# Extra area (in bandwidths) around the data and the evaluation points
+# after which the kernel is considered zero
+CUTOFF = 5
+
+
+def scott_bandwidth(samples) -> float:
+    """
+    Bandwidth (standard deviation of the kernel) by Scott's rule. Same as
+    `gaussian_kde(samples).factor * std` in one dimension
+    """
+    samples = np.asarray(samples, dtype=float)
+    if len(samples) < 2:
+        raise ValueError("At least two samples are needed for the density")
+    std = np.std(samples, ddof=1)
+    if std == 0:
+        raise ValueError("Density of identical samples is not defined")
+    return std * len(samples) ** (-1 / 5)
+
+
+def kde_groups(groups: Sequence, points, bins: int = BINS) -> np.ndarray:
+    """
+    Gaussian kernel density of many groups of samples
+
+    :param groups: List of arrays of samples
+    :param points: Points where density is evaluated
+    :param bins: Number of bins of the internal grid
+    :return: Array of shape (groups, points)
+    """
+    groups = [np.asarray(x, dtype=float).ravel() for x in groups]
+    points = np.asarray(points, dtype=float)
+    if len(groups) == 0:
+        return np.empty((0, len(points)))
+    bandwidths = np.asarray([scott_bandwidth(x) for x in groups])
+
+    # Grid of every group covers its samples (density further away is
+    # taken as zero). All the grids have same number of bins, which is
+    # enough for the spacing of every grid to be below MAX_SPACING
+    lo = np.asarray([x.min() for x in groups]) - CUTOFF * bandwidths
+    hi = np.asarray([x.max() for x in groups]) + CUTOFF * bandwidths
+    needed = ((hi - lo) / (MAX_SPACING * bandwidths)).max() + 1
+    if needed > bins:
+        bins = 1 << math.ceil(math.log2(needed))
+        if bins > MAX_BINS:
+            warnings.warn(f"Samples span {needed:.0f} times the grid "
+                          f"spacing, density is computed with {MAX_BINS} "
+                          f"bins and can be coarse")
+            bins = MAX_BINS
+    dx = (hi - lo) / (bins - 1)
+
+    # Linear binning of every group (weights of a group add up to 1)
+    samples = np.concatenate(groups)
+    group = np.repeat(np.arange(len(groups)), [len(x) for x in groups])
+    weights = np.repeat([1 / len(x) for x in groups], [len(x) for x in groups])
+    position = (samples - lo[group]) / dx[group]
+    left = np.minimum(np.floor(position).astype(int), bins - 2)
+    fraction = position - left
+    flat = group * bins + left
+    size = len(groups) * bins
+    binned = (np.bincount(flat, weights * (1 - fraction), minlength=size) +
+              np.bincount(flat + 1, weights * fraction, minlength=size))
+    binned = binned.reshape(len(groups), bins)
+
+    # Convolution with the Gaussian kernel. Zero padding to twice the size
+    # avoids wrap around
+    size = 2 * bins
+    frequency = np.fft.rfftfreq(size)[None, :] / dx[:, None]
+    kernel = np.exp(-2 * (np.pi * frequency * bandwidths[:, None]) ** 2)
+    spectrum = np.fft.rfft(binned, n=size, axis=1) * kernel
+    density = np.fft.irfft(spectrum, n=size, axis=1)[:, :bins] / dx[:, None]
+
+    steps = np.arange(bins)
+    return np.vstack([np.interp(points, a + d * steps, x, left=0, right=0)
+                      for a, d, x in zip(lo, dx, density)])
+
+
+def kde(samples, points, bins: int = BINS) -> np.ndarray:
+    """
+    Gaussian kernel density of the samples evaluated at given points.
+    Drop-in for `gaussian_kde(samples)(points)`
+    """
+    return kde_groups([samples], points, bins)[0]
@@ -0,0 +1,112 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Level of detail for geometries. There is no point in pushing vertices
+#  which are closer than a pixel of the output into matplotlib, hence every
+#  layer is simplified with a tolerance derived from the visible extent,
+#  size of the axes and output DPI. Tolerances are rounded down to powers
+#  of two so that similar maps share the same simplified layer. Simplified
+#  layers are kept in memory and on disk (in the shape file cache) keyed by
+#  the content of the layer. Whole layers are simplified before they are
+#  clipped to the extent (see helpers.choropleth), so cached layers do not
+#  depend on the extent.
+
+import hashlib
+import math
+import os
+import warnings
+from typing import List
+
+import cartopy.crs as crs
+import geopandas
+import shapely.wkb
+
+from helpers.cache import CACHE_DIR, HAS_PYARROW, write_atomic
+
+# Highest DPI used for saving plots in this project. As the output DPI is
+# not known while drawing, this keeps simplification below a pixel for
+# every output.
+DEFAULT_DPI = 300
+
+_LAYERS = {}
+
+
+def tolerance_for(extent, width: float, height: float,
+                  dpi: float = DEFAULT_DPI, pixels: float = 0.5) -> float:
+    """
+    Simplification tolerance (in degrees) for given view
+
+    :param extent: [x0, x1, y0, y1] of the view in degrees
+    :param width: Width of the axes in inches
+    :param height: Height of the axes in inches
+    :param dpi: Output DPI
+    :param pixels: Allowed error in pixels
+    :return: Tolerance rounded down to power of two (0 means no
+        simplification)
+    """
+    x0, x1, y0, y1 = extent
+    size = max(abs(x1 - x0) / (width * dpi), abs(y1 - y0) / (height * dpi))
+    tolerance = size * pixels
+    if tolerance <= 0 or not math.isfinite(tolerance):
+        return 0
+    return 2.0 ** math.floor(math.log2(tolerance))
+
+
+def tolerance_for_axes(ax, dpi: float = DEFAULT_DPI,
+                       pixels: float = 0.5) -> float:
+    """
+    Simplification tolerance for current extent and size of the GeoAxes.
+    Extent should be set before calling this.
+    """
+    extent = ax.get_extent(crs.PlateCarree())
+    bbox = ax.get_window_extent()
+    width = bbox.width / ax.figure.dpi
+    height = bbox.height / ax.figure.dpi
+    if width <= 0 or height <= 0:
+        return 0
+    return tolerance_for(extent, width, height, dpi, pixels)
+
+
+def layer_key(geometries: List) -> str:
+    """
+    Hash of the content of the layer
+    """
+    digest = hashlib.sha1()
+    for g in geometries:
+        digest.update(shapely.wkb.dumps(g) if g is not None else b"")
+    return digest.hexdigest()[:16]
+
+
+def simplify(geometries: List, tolerance: float) -> List:
+    """
+    Topology preserving simplification of the whole layer with caching.
+    Every geometry stays valid, but shared borders are simplified
+    independently. At sub-pixel tolerance this is not visible.
+
+    :param geometries: List of shapely geometries
+    :param tolerance: Tolerance in units of geometries
+    :return: List of simplified geometries (same order)
+    """
+    if tolerance <= 0 or len(geometries) == 0:
+        return list(geometries)
+
+    key = (layer_key(geometries), tolerance)
+    if key in _LAYERS:
+        return _LAYERS[key]
+
+    filename = os.path.join(CACHE_DIR, f"lod-{key[0]}-{tolerance!r}.parquet")
+    if HAS_PYARROW and os.path.isfile(filename):
+        simplified = geopandas.read_parquet(filename).geometry.to_list()
+    else:
+        series = geopandas.GeoSeries(list(geometries))
+        simplified = series.simplify(tolerance, preserve_topology=True)
+        if HAS_PYARROW:
+            try:
+                write_atomic(simplified.to_frame("geometry"), filename)
+            except OSError as e:
+                warnings.warn(f"Unable to write LOD cache: {e}")
+        simplified = simplified.to_list()
+
+    _LAYERS[key] = simplified
+    return simplified
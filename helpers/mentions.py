@@ -0,0 +1,188 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Counting mentions of many names (e.g. countries) in a text with a single
+#  pass over it. All the patterns are compiled into one alternation
+#  (longest first) inside a lookahead. At every word start the longest
+#  matching pattern wins and all the shorter patterns which also match at
+#  that position (they are always prefixes of the winner) are credited
+#  from a precomputed table. Hence the result is same as running one
+#  `re.findall` per pattern.
+#
+#  Large corpora (e.g. subtitles of whole series) are streamed in chunks.
+#  Every chunk keeps a small window of the previous one so that names split
+#  across chunk boundaries are still found exactly once. Many files can be
+#  counted in parallel and the results are merged.
+
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List
+
+# Characters read from a file in one go
+CHUNK_SIZE = 1 << 20
+
+# Subtitle index and timing lines, and formatting tags
+_SRT_LINE = re.compile(r"^[ \t]*(\d+|\d+:\d+:\d+[,.]\d+[ \t]*-->.*)"
+                       r"[ \t]*\r?$", re.MULTILINE)
+_SRT_TAG = re.compile(r"<[^>\n]*>|\{[^}\n]*\}")
+
+
+class MentionCounter:
+    """
+    Counts mentions of names in a single pass
+
+    Every name is matched either exactly (`\\bname\\b`) or as a stem, where
+    any word starting with the name (except its last letter) is counted,
+    e.g. "india" also counts "indian". Stem matching is same as earlier
+    `\\b{name}?\\w+\\b` pattern of bbt analysis.
+
+    :param names: Dictionary of key and list of names / aliases
+    :param exact: Names which should be matched exactly
+    """
+
+    def __init__(self, names: Dict[str, List[str]],
+                 exact: Iterable[str] = ()):
+        exact = set(exact)
+        self.keys = list(names)
+        patterns = {}
+        for key, words in names.items():
+            for w in words:
+                if w in exact:
+                    patterns.setdefault((w, True), []).append(key)
+                else:
+                    patterns.setdefault((w[:-1], False), []).append(key)
+
+        ordered = sorted(patterns, key=lambda x: len(x[0]), reverse=True)
+        alternatives = []
+        self._credits = {}
+        for group, (literal, is_exact) in enumerate(ordered, start=1):
+            tail = r"\b" if is_exact else r"(?=\w)"
+            alternatives.append(f"({re.escape(literal)}{tail})")
+            self._credits[group] = self._prefix_keys(literal, patterns)
+        # Text needed after a position to decide a match at it
+        self._window = max((len(x[0]) for x in ordered), default=0) + 1
+        self.pattern = re.compile(r"\b(?=" + "|".join(alternatives) + ")")
+
+    @staticmethod
+    def _prefix_keys(literal: str, patterns: dict) -> List[str]:
+        # Keys of all the patterns which match whenever given literal
+        # matches
+        keys = []
+        for (other, is_exact), other_keys in patterns.items():
+            if other == literal:
+                keys.extend(other_keys)
+                continue
+            if len(other) >= len(literal) or not literal.startswith(other):
+                continue
+            # Character after the shorter literal is known in advance
+            is_word = re.match(r"\w", literal[len(other)]) is not None
+            if is_word != is_exact:
+                keys.extend(other_keys)
+        return keys
+
+    def _count(self, counts: Counter, text: str, start: int, stop: int):
+        # Matches starting in [start, stop). Characters before start are
+        # still used for the word boundary
+        credits = self._credits
+        for m in self.pattern.finditer(text, start):
+            if m.start() >= stop:
+                break
+            for key in credits[m.lastindex]:
+                counts[key] += 1
+
+    def count(self, text: str) -> Counter:
+        """
+        Number of mentions of every key in the text
+        """
+        counts = Counter({x: 0 for x in self.keys})
+        self._count(counts, text, 0, len(text))
+        return counts
+
+    def count_chunks(self, chunks: Iterable[str]) -> Counter:
+        """
+        Same as `count` but on a stream of text chunks. Only a small part
+        of the previous chunk is kept in memory.
+        """
+        counts = Counter({x: 0 for x in self.keys})
+        buffer = ""
+        start = 0
+        for chunk in chunks:
+            buffer += chunk
+            stop = len(buffer) - self._window
+            if stop <= start:
+                continue
+            self._count(counts, buffer, start, stop)
+            # One character before the next start is kept for \b
+            buffer = buffer[stop - 1:]
+            start = 1
+        self._count(counts, buffer, start, len(buffer))
+        return counts
+
+    def count_file(self, filename: str,
+                   chunk_size: int = CHUNK_SIZE) -> Counter:
+        """
+        Streams a plain text or SRT subtitle file and counts mentions
+        """
+        return self.count_chunks(read_text(filename, chunk_size))
+
+
+def _read_chunks(filename: str, chunk_size: int) -> Iterator[str]:
+    with open(filename, encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _clean_srt(text: str) -> str:
+    return _SRT_TAG.sub("", _SRT_LINE.sub("", text))
+
+
+def read_text(filename: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Text of the file in chunks. For SRT files, subtitle numbers, timings and
+    formatting tags are removed (chunks are cut at line ends for this).
+    """
+    if not filename.lower().endswith(".srt"):
+        yield from _read_chunks(filename, chunk_size)
+        return
+
+    rest = ""
+    for chunk in _read_chunks(filename, chunk_size):
+        chunk = rest + chunk
+        cut = chunk.rfind("\n") + 1
+        rest = chunk[cut:]
+        if cut > 0:
+            yield _clean_srt(chunk[:cut])
+    if rest:
+        yield _clean_srt(rest)
+
+
+def count_files(counter: MentionCounter, filenames: Iterable[str],
+                jobs: int = None, chunk_size: int = CHUNK_SIZE) -> Counter:
+    """
+    Counts mentions in many files and merges the result. Files are spread
+    over a process pool when jobs is not 1.
+
+    :param counter: MentionCounter to use
+    :param filenames: List of plain text / SRT files
+    :param jobs: Number of processes (default: number of CPUs)
+    :param chunk_size: Characters read from a file in one go
+    :return: Total number of mentions of every key
+    """
+    filenames = list(filenames)
+    total = Counter({x: 0 for x in counter.keys})
+    if jobs == 1 or len(filenames) <= 1:
+        for filename in filenames:
+            total.update(counter.count_file(filename, chunk_size))
+        return total
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(counter.count_file, filenames,
+                               [chunk_size] * len(filenames))
+        for result in results:
+            total.update(result)
+    return total
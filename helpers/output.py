@@ -0,0 +1,50 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Output of the analyses. Interactively, plots are saved in the current
+#  folder and shown on the screen. In batch mode (see helpers.batch) every
+#  analysis gets its own output folder and nothing is shown.
+
+import os
+
+_OUTPUT = {"directory": None}
+
+
+def set_output(directory: str = None):
+    """
+    Switches to batch mode where all the output goes into given folder.
+    None switches back to the interactive mode.
+    """
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    _OUTPUT["directory"] = directory
+
+
+def is_batch() -> bool:
+    return _OUTPUT["directory"] is not None
+
+
+def output_path(filename: str) -> str:
+    """
+    Path where given output file (e.g. "plot.png") should be written
+    """
+    if _OUTPUT["directory"] is None:
+        return filename
+    return os.path.join(_OUTPUT["directory"], os.path.basename(filename))
+
+
+def show():
+    """
+    Same as `plt.show()`. In batch mode, open figures are saved instead if
+    the analysis did not write any output itself, and then closed.
+    """
+    import matplotlib.pyplot as plt
+
+    if not is_batch():
+        plt.show()
+        return
+    if len(os.listdir(_OUTPUT["directory"])) == 0:
+        for number in plt.get_fignums():
+            plt.figure(number).savefig(output_path(f"figure-{number}.png"))
+    plt.close("all")
@@ -0,0 +1,187 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Multiway number partitioning: splitting values (e.g. export of every
+#  country) into k groups with sums as equal as possible. All the methods
+#  return a group label for every value (in the input order).
+#
+#  lpt    : Largest first, every value goes to the group with the smallest
+#           sum (heap). O(n log n + n log k)
+#  kk     : Karmarkar-Karp largest differencing. Usually much better than
+#           LPT for large n with the same complexity
+#  exact  : Branch and bound which minimizes the largest sum. Exponential,
+#           hence only for small n
+#
+#  Values can also be grouped by their cumulative share from the top (e.g.
+#  countries which make 50%, 70% and 90% of the world export).
+
+import heapq
+import itertools
+from typing import Sequence
+
+import numpy as np
+
+# Largest number of values accepted by exact method (few seconds for three
+# groups of random real values)
+EXACT_LIMIT = 18
+
+
+def _check(values, k: int) -> np.ndarray:
+    if k < 1:
+        raise ValueError(f"Number of groups should be at least 1, got {k}")
+    return np.asarray(values, dtype=float)
+
+
+def lpt(values: Sequence[float], k: int) -> np.ndarray:
+    """
+    Greedy partitioning: largest value first to the group with the smallest
+    sum (ties go to the group with the lower label)
+    """
+    values = _check(values, k)
+    labels = np.zeros(len(values), dtype=int)
+    heap = [(0.0, g) for g in range(k)]
+    for i in np.argsort(-values, kind="stable"):
+        total, g = heapq.heappop(heap)
+        labels[i] = g
+        heapq.heappush(heap, (total + values[i], g))
+    return labels
+
+
+def karmarkar_karp(values: Sequence[float], k: int) -> np.ndarray:
+    """
+    Largest differencing method. Every value starts as a partial partition
+    (value, 0, ..., 0). Two partitions with largest difference between
+    their largest and smallest sums are repeatedly merged by combining
+    largest sum of one with the smallest of other.
+    """
+    values = _check(values, k)
+    if len(values) == 0:
+        return np.zeros(0, dtype=int)
+    counter = itertools.count()
+    heap = []
+    for i, v in enumerate(values):
+        sums = [v] + [0.0] * (k - 1)
+        members = [[i]] + [[] for _ in range(k - 1)]
+        heapq.heappush(heap, (-v, next(counter), sums, members))
+
+    while len(heap) > 1:
+        _, _, sums_a, members_a = heapq.heappop(heap)
+        _, _, sums_b, members_b = heapq.heappop(heap)
+        # Both are sorted with largest sum first
+        sums = [sums_a[j] + sums_b[k - 1 - j] for j in range(k)]
+        members = members_a
+        for j in range(k):
+            members[j].extend(members_b[k - 1 - j])
+        order = sorted(range(k), key=lambda x: sums[x], reverse=True)
+        sums = [sums[j] - sums[order[-1]] for j in order]
+        members = [members[j] for j in order]
+        heapq.heappush(heap, (-sums[0], next(counter), sums, members))
+
+    labels = np.zeros(len(values), dtype=int)
+    for g, members in enumerate(heap[0][3]):
+        labels[members] = g
+    return labels
+
+
+def exact(values: Sequence[float], k: int) -> np.ndarray:
+    """
+    Partition with the smallest possible largest sum (branch and bound,
+    starting from the better of LPT and Karmarkar-Karp)
+    """
+    values = _check(values, k)
+    if len(values) > EXACT_LIMIT:
+        raise ValueError(f"Exact partitioning is only possible for up to "
+                         f"{EXACT_LIMIT} values, got {len(values)}")
+    if len(values) == 0:
+        return np.zeros(0, dtype=int)
+
+    best_labels = min([lpt(values, k), karmarkar_karp(values, k)],
+                      key=lambda x: largest_sum(values, x, k))
+    best = largest_sum(values, best_labels, k)
+    # No partition can be better than this
+    bound = max(values.sum() / k, values.max())
+
+    order = np.argsort(-values, kind="stable")
+    items = values[order]
+    # Sum of the values which are not yet assigned
+    rest = np.append(np.cumsum(items[::-1])[::-1], 0)
+    sums = [0.0] * k
+    current = np.zeros(len(values), dtype=int)
+
+    def search(n: int):
+        nonlocal best, best_labels
+        smallest = min(range(k), key=lambda x: sums[x])
+        if sums[smallest] + rest[n] <= max(sums):
+            # Rest fits in the smallest group without changing the largest
+            # sum, no other assignment can do better
+            if max(sums) < best:
+                best = max(sums)
+                current[n:] = smallest
+                best_labels = np.empty(len(values), dtype=int)
+                best_labels[order] = current
+            return
+        seen = set()
+        for g in range(k):
+            # Groups with same sum give same partitions
+            if sums[g] in seen or sums[g] + items[n] >= best:
+                continue
+            seen.add(sums[g])
+            sums[g] += items[n]
+            current[n] = g
+            search(n + 1)
+            sums[g] -= items[n]
+            if best <= bound:
+                return
+
+    if best > bound:
+        search(0)
+    return best_labels
+
+
+def share_groups(values: Sequence[float],
+                 thresholds: Sequence[float]) -> np.ndarray:
+    """
+    Groups values (largest first) by their cumulative share of the total.
+    A value goes into the first group until the share of the values before
+    it reaches the first threshold, and so on.
+
+    :param values: Values to group
+    :param thresholds: Increasing cumulative shares in percent, e.g.
+        [50, 70, 90]
+    :return: Group label of every value (0 to len(thresholds))
+    """
+    values = np.asarray(values, dtype=float)
+    order = np.argsort(-values, kind="stable")
+    shares = values[order] * 100 / values.sum()
+    # Share of all the values before the current one
+    before = np.cumsum(shares) - shares
+    labels = np.empty(len(values), dtype=int)
+    labels[order] = np.searchsorted(np.asarray(thresholds, dtype=float),
+                                    before, side="right")
+    return labels
+
+
+def largest_sum(values: Sequence[float], labels: np.ndarray,
+                k: int) -> float:
+    """
+    Largest group sum of the partition
+    """
+    return np.bincount(labels, weights=values, minlength=k).max()
+
+
+def partition(values: Sequence[float], k: int,
+              method: str = "lpt") -> np.ndarray:
+    """
+    Splits values into k groups with (nearly) equal sums
+
+    :param values: Values to split
+    :param k: Number of groups
+    :param method: "lpt", "kk" or "exact"
+    :return: Group label of every value
+    """
+    methods = {"lpt": lpt, "kk": karmarkar_karp, "exact": exact}
+    if method not in methods:
+        raise ValueError(f"Unknown partitioning method '{method}'. Use one "
+                         f"of {list(methods)}")
+    return methods[method](values, k)
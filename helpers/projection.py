@@ -0,0 +1,79 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Cache of projected geometries. Projecting country polygons with cartopy
+#  (cutting at the boundary of the projection, interpolating, etc.) is the
+#  most expensive part of drawing a map and gives the same result every
+#  time for the same layer and projection. Projected layers are kept in
+#  memory and on disk (in the shape file cache) keyed by the content of the
+#  layer (which already includes the level of detail and clipping) and the
+#  parameters of source and target projection. Layers clipped to different
+#  extents have different content, hence only the most recently used
+#  MAX_FILES projected layers are kept on disk.
+
+import hashlib
+import os
+import warnings
+from typing import List
+
+import cartopy.crs as crs
+import geopandas
+
+from helpers.cache import CACHE_DIR, HAS_PYARROW, prune, touch, write_atomic
+from helpers.lod import layer_key
+
+# Largest number of projected layers in the disk cache
+MAX_FILES = 64
+
+_PROJECTED = {}
+
+
+def projection_key(projection: crs.CRS, src_crs: crs.CRS) -> str:
+    """
+    Hash of the parameters of the target and source projection
+    """
+    digest = hashlib.sha1()
+    for p in (projection, src_crs):
+        digest.update(type(p).__name__.encode())
+        digest.update(p.proj4_init.encode())
+        digest.update(repr(getattr(p, "bounds", None)).encode())
+    return digest.hexdigest()[:16]
+
+
+def project_geometries(geometries: List, projection: crs.Projection,
+                       src_crs: crs.CRS = None) -> List:
+    """
+    Projects all geometries with caching
+
+    :param geometries: List of shapely geometries
+    :param projection: Target projection (usually `ax.projection`)
+    :param src_crs: CRS of the geometries (default PlateCarree)
+    :return: List of geometries in projection coordinates (same order)
+    """
+    if src_crs is None:
+        src_crs = crs.PlateCarree()
+    if len(geometries) == 0:
+        return []
+
+    key = (layer_key(geometries), projection_key(projection, src_crs))
+    if key in _PROJECTED:
+        return _PROJECTED[key]
+
+    filename = os.path.join(CACHE_DIR, f"proj-{key[0]}-{key[1]}.parquet")
+    if HAS_PYARROW and os.path.isfile(filename):
+        projected = geopandas.read_parquet(filename).geometry.to_list()
+        touch(filename)
+    else:
+        projected = [projection.project_geometry(x, src_crs)
+                     for x in geometries]
+        if HAS_PYARROW:
+            try:
+                series = geopandas.GeoSeries(projected)
+                write_atomic(series.to_frame("geometry"), filename)
+                prune("proj-", MAX_FILES)
+            except OSError as e:
+                warnings.warn(f"Unable to write projection cache: {e}")
+
+    _PROJECTED[key] = projected
+    return projected
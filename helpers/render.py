@@ -0,0 +1,125 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Parallel rendering of animations. Frame range is split into contiguous
+#  segments, every worker process builds its own (headless) figure, renders
+#  its frames to raw RGBA buffers and pipes them into its own ffmpeg
+#  process. Finally, all segments are joined without re-encoding.
+#
+#  Figure is created by `setup()` which should return (fig, fargs) and every
+#  frame is drawn by `update(frame, *fargs)`, i.e. same convention as
+#  FuncAnimation. Both have to be top-level functions so that they can be
+#  sent to worker processes.
+
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Sequence
+
+import matplotlib
+
+
+def _ffmpeg() -> str:
+    return matplotlib.rcParams["animation.ffmpeg_path"]
+
+
+def _split(frames: Sequence, parts: int) -> List[Sequence]:
+    size, extra = divmod(len(frames), parts)
+    segments = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            segments.append(frames[start:end])
+        start = end
+    return segments
+
+
+def _render_segment(setup: Callable, update: Callable, frames: Sequence,
+                    warmup: Sequence, filename: str, fps: float,
+                    dpi: float):
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, fargs = setup()
+    if dpi is not None:
+        fig.set_dpi(dpi)
+    # Animations which carry state from previous frames (e.g. yearly bars)
+    # are brought up to date without drawing anything
+    for frame in warmup:
+        update(frame, *fargs)
+
+    fig.canvas.draw()
+    width, height = fig.canvas.get_width_height(physical=True)
+    command = [_ffmpeg(), "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "rgba",
+               "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+               "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+               "-vcodec", matplotlib.rcParams["animation.codec"],
+               "-pix_fmt", "yuv420p", filename]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE)
+    try:
+        for frame in frames:
+            update(frame, *fargs)
+            fig.canvas.draw()
+            process.stdin.write(fig.canvas.buffer_rgba())
+    finally:
+        process.stdin.close()
+        process.wait()
+        plt.close(fig)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed while writing {filename}")
+    return filename
+
+
+def render_parallel(setup: Callable, update: Callable, frames: Sequence,
+                    filename: str, jobs: int = None, fps: float = 5,
+                    dpi: float = None, replay: bool = False):
+    """
+    Renders animation frames in multiple processes and writes a single
+    video file
+
+    :param setup: Function returning figure and extra arguments for update
+    :param update: Function called as update(frame, *fargs) for every frame
+    :param frames: Sequence of frames (e.g. range)
+    :param filename: Output video file
+    :param jobs: Number of processes (default: number of CPUs)
+    :param fps: Frames per second of the output video
+    :param dpi: DPI of the frames (default: DPI of the figure)
+    :param replay: If True, every worker calls update on all frames before
+        its own segment (without drawing) so that state carried between
+        frames is same as in sequential rendering
+    """
+    frames = list(frames)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    segments = _split(frames, max(1, min(jobs, len(frames))))
+
+    tmp_dir = tempfile.mkdtemp(prefix="render-")
+    try:
+        names = [os.path.join(tmp_dir, f"segment-{i:04d}.mp4")
+                 for i in range(len(segments))]
+        with ProcessPoolExecutor(max_workers=len(segments)) as executor:
+            futures = []
+            start = 0
+            for segment, name in zip(segments, names):
+                warmup = frames[:start] if replay else []
+                futures.append(executor.submit(_render_segment, setup,
+                                               update, segment, warmup,
+                                               name, fps, dpi))
+                start += len(segment)
+            for f in futures:
+                f.result()
+
+        file_list = os.path.join(tmp_dir, "segments.txt")
+        with open(file_list, "w") as f:
+            for name in names:
+                print(f"file '{name}'", file=f)
+        subprocess.run([_ffmpeg(), "-y", "-loglevel", "error",
+                        "-f", "concat", "-safe", "0", "-i", file_list,
+                        "-c", "copy", filename], check=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,117 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Process-wide store of Natural Earth country shapes. Shapefile is parsed
+#  only once per resolution (and loaded from the on-disk cache after the
+#  first run) and records are kept in memory with hash indices on the
+#  country codes.
+
+from typing import Dict, Iterable, List
+
+from helpers.cache import read_shapefile
+
+# Columns (in order of preference) which are indexed for lookup
+CODE_COLUMNS = ["ADM0_A3", "ISO_A3", "ISO_A2"]
+
+# Natural Earth uses this for missing codes (e.g. ISO_A3 of France)
+MISSING_CODE = "-99"
+
+_STORES = {}
+
+
+class Country:
+    """
+    Light weight replacement of cartopy shapereader record
+    """
+    __slots__ = ("attributes", "geometry")
+
+    def __init__(self, attributes: dict, geometry):
+        self.attributes = attributes
+        self.geometry = geometry
+
+    @property
+    def bounds(self):
+        return self.geometry.bounds
+
+
+class CountryStore:
+    """
+    In-memory collection of admin_0 country records
+
+    Records have same `attributes` and `geometry` fields as cartopy
+    shapereader records, so existing code using them keeps on working.
+    """
+
+    def __init__(self, resolution: str = "110m"):
+        # cartopy is needed only for locating (or downloading) the file
+        import cartopy.io.shapereader as shpreader
+
+        self.resolution = resolution
+        self.filename = shpreader.natural_earth(resolution=resolution,
+                                                category='cultural',
+                                                name='admin_0_countries')
+        df = read_shapefile(self.filename)
+        attributes = df.drop(columns="geometry").to_dict("records")
+        self._records = [Country(a, g) for a, g in
+                         zip(attributes, df.geometry.values)]
+        self._index = {x: {} for x in CODE_COLUMNS}
+        for record in self._records:
+            for col in CODE_COLUMNS:
+                code = record.attributes.get(col)
+                if code and code != MISSING_CODE:
+                    self._index[col].setdefault(code, record)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, code):
+        return self.get(code) is not None
+
+    def __getitem__(self, code: str):
+        record = self.get(code)
+        if record is None:
+            raise KeyError(code)
+        return record
+
+    @property
+    def codes(self) -> List[str]:
+        return [x.attributes['ADM0_A3'] for x in self._records]
+
+    def get(self, code: str, default=None):
+        """
+        Finds record by ADM0_A3, ISO alpha-3 or ISO alpha-2 code
+
+        :param code: Country code
+        :param default: Returned when code is not found
+        """
+        for col in CODE_COLUMNS:
+            if code in self._index[col]:
+                return self._index[col][code]
+        return default
+
+    def select(self, codes: Iterable[str]) -> Dict[str, object]:
+        """
+        Bulk lookup of records. Codes which are not found are skipped.
+
+        :param codes: Iterable of country codes
+        :return: Dictionary of code and record
+        """
+        data = {}
+        for code in codes:
+            record = self.get(code)
+            if record is not None:
+                data[code] = record
+        return data
+
+
+def get_countries(resolution: str = "110m") -> CountryStore:
+    """
+    Returns the shared country store for given resolution
+    """
+    if resolution not in _STORES:
+        _STORES[resolution] = CountryStore(resolution)
+    return _STORES[resolution]
@@ -0,0 +1,204 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  Spatial lookups on region polygons (countries, Indian states,
+#  meteorological subdivisions). Index is built only once per layer and
+#  points are resolved in vectorized batches: STRtree gives candidate
+#  polygons by bounding box and exact test is done on prepared geometries.
+#  Same index answers radius queries ("regions within N km"): candidates
+#  come from the bounding box of the geodesic disk (or of the buffered
+#  region) and only those are tested exactly.
+
+import math
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+from shapely.geometry import box
+
+from helpers.geodesic import KM_PER_DEGREE, disk, distance_matrix
+from helpers.shapes import get_countries
+
+# Number of points resolved in one go. Keeps memory bounded for millions
+# of points
+BATCH_SIZE = 500000
+
+# Boundaries are split in segments of (buffer / NEAR_STEPS) for distance
+# between regions, i.e. distances are within ~1/NEAR_STEPS of the buffer
+NEAR_STEPS = 20
+
+# Smallest segment (in degrees) used for distance between regions
+MIN_STEP = 0.01
+
+_COUNTRY_INDEX = {}
+
+
+class RegionIndex:
+    """
+    Spatial index over a layer of region polygons
+
+    :param codes: Code of every region
+    :param geometries: Geometry of every region (same order as codes)
+    """
+
+    def __init__(self, codes: Iterable[str], geometries: Iterable):
+        self.codes = np.asarray(list(codes), dtype=object)
+        self.geometries = np.asarray(list(geometries), dtype=object)
+        self.tree = STRtree(self.geometries)
+        shapely.prepare(self.geometries)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_frame(cls, df, code_column: str):
+        """
+        Index from a GeoDataFrame
+
+        :param df: GeoDataFrame
+        :param code_column: Column used as region code
+        """
+        return cls(df[code_column], df.geometry)
+
+    def lookup(self, lon, lat) -> np.ndarray:
+        """
+        Region code of every point
+
+        :param lon: Array of longitudes
+        :param lat: Array of latitudes
+        :return: Array of codes (None where point is not in any region). If
+            point is on a shared border, first region in the layer is used
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        result = np.full(len(lon), None, dtype=object)
+        for start in range(0, len(lon), BATCH_SIZE):
+            x = lon[start:start + BATCH_SIZE]
+            y = lat[start:start + BATCH_SIZE]
+            # Candidates by bounding box
+            points, regions = self.tree.query(shapely.points(x, y))
+            # Exact test on prepared geometries
+            hit = shapely.intersects_xy(self.geometries[regions],
+                                        x[points], y[points])
+            points, regions = points[hit], regions[hit]
+            # Keep first region of every point
+            order = np.lexsort((regions, points))
+            points, regions = points[order], regions[order]
+            points, first = np.unique(points, return_index=True)
+            result[start + points] = self.codes[regions[first]]
+        return result
+
+    def count(self, lon, lat, weights=None) -> Dict[str, float]:
+        """
+        Aggregates points per region. Result can be directly used with
+        `helpers.choropleth.choropleth`
+
+        :param lon: Array of longitudes
+        :param lat: Array of latitudes
+        :param weights: Optional weight of every point (default 1)
+        :return: Dictionary of region code and number (or sum of weights)
+            of points in it
+        """
+        codes = pd.Series(self.lookup(lon, lat))
+        if weights is None:
+            weights = np.ones(len(codes))
+        weights = pd.Series(np.asarray(weights, dtype=float))
+        found = codes.notna()
+        return weights[found].groupby(codes[found]).sum().to_dict()
+
+    def _unique_codes(self, index) -> List[str]:
+        return list(dict.fromkeys(self.codes[np.sort(index)]))
+
+    def within(self, lon: float, lat: float, radius: float,
+               method: str = "haversine") -> List[str]:
+        """
+        Regions which intersect the geodesic disk around a point
+
+        :param lon: Longitude of the center
+        :param lat: Latitude of the center
+        :param radius: Radius in km
+        :param method: see `helpers.geodesic.destination`
+        :return: Codes of the regions (in order of the layer)
+        """
+        area = disk(lon, lat, radius, method=method)
+        return self._unique_codes(self.tree.query(area,
+                                                  predicate="intersects"))
+
+    def near(self, code: str, buffer: float) -> List[str]:
+        """
+        Regions within buffer km (great circle) of the given region,
+        including the region itself
+
+        :param code: Code of the region
+        :param buffer: Distance in km
+        :return: Codes of the regions (in order of the layer)
+        """
+        mask = self.codes == code
+        if not mask.any():
+            raise KeyError(code)
+        region = shapely.union_all(self.geometries[mask])
+        boxes = _grown_boxes(region.bounds, buffer)
+        candidates = np.unique(self.tree.query(boxes)[1])
+        touching = shapely.intersects(self.geometries[candidates], region)
+
+        step = max(buffer / KM_PER_DEGREE / NEAR_STEPS, MIN_STEP)
+        result = list(candidates[touching])
+        for i in candidates[~touching]:
+            geometry = self.geometries[i]
+            # Only boundary parts which can be close enough are compared
+            a = _vertices(region, step,
+                          _grown_boxes(geometry.bounds, buffer))
+            b = _vertices(geometry, step, boxes)
+            if len(a) == 0 or len(b) == 0:
+                continue
+            distances = distance_matrix(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+            if distances.min() <= buffer:
+                result.append(i)
+        return self._unique_codes(np.asarray(result, dtype=int))
+
+
+def _grown_boxes(bounds, buffer: float) -> List:
+    # Boxes (split at the antimeridian) containing every point within
+    # buffer km of the given bounds
+    x0, y0, x1, y1 = bounds
+    delta = buffer / KM_PER_DEGREE
+    y0, y1 = max(y0 - delta, -90), min(y1 + delta, 90)
+    # Largest longitude difference at the highest latitude of the bounds
+    lat = math.radians(max(abs(bounds[1]), abs(bounds[3])))
+    ratio = math.sin(math.radians(min(delta, 90))) / math.cos(lat)
+    if ratio >= 1:
+        return [box(-180, y0, 180, y1)]
+    dx = math.degrees(math.asin(ratio))
+    x0, x1 = x0 - dx, x1 + dx
+    if x1 - x0 >= 360:
+        return [box(-180, y0, 180, y1)]
+    boxes = [box(max(x0, -180), y0, min(x1, 180), y1)]
+    if x0 < -180:
+        boxes.append(box(x0 + 360, y0, 180, y1))
+    if x1 > 180:
+        boxes.append(box(-180, y0, x1 - 360, y1))
+    return boxes
+
+
+def _vertices(geometry, step: float, boxes: List) -> np.ndarray:
+    # Points along the boundary (at most step apart) inside the boxes
+    points = shapely.get_coordinates(shapely.segmentize(geometry, step))
+    inside = np.zeros(len(points), dtype=bool)
+    for b in boxes:
+        inside |= shapely.intersects_xy(b, points[:, 0], points[:, 1])
+    return points[inside]
+
+
+def country_index(resolution: str = "110m") -> RegionIndex:
+    """
+    Shared index of Natural Earth countries (codes are ADM0_A3)
+    """
+    if resolution not in _COUNTRY_INDEX:
+        countries = get_countries(resolution)
+        _COUNTRY_INDEX[resolution] = RegionIndex(
+            [x.attributes["ADM0_A3"] for x in countries],
+            [x.geometry for x in countries])
+    return _COUNTRY_INDEX[resolution]
@@ -0,0 +1,75 @@
+#  WeirdData Copyright (c) 2021.
+#  Author: Rohit Suratekar
+#  Web: https://github.com/WeirdData/GeoAnalysis
+#
+#  World Bank indicator tables (one row per country, one column per year).
+#  Every file is parsed only once per process into a country x year matrix.
+
+import warnings
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+COL_COUNTRY_NAME = "Country Name"
+COL_COUNTRY_CODE = "Country Code"
+
+_TABLES = {}
+
+
+class WorldBankTable:
+    """
+    Country x year matrix of a World Bank indicator
+
+    `values` has shape (countries, years) with NaN for missing data and
+    `mask` is True wherever data is available.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        df = pd.read_csv(filename)
+        year_columns = [x for x in df.columns if str(x).strip().isdigit()]
+        self.years = [int(x) for x in year_columns]
+        self.names = df[COL_COUNTRY_NAME].to_list()
+        self.codes = df[COL_COUNTRY_CODE].to_list()
+        self.values = df[year_columns].to_numpy(dtype=float)
+        self.mask = ~np.isnan(self.values)
+        self._year_index = {x: i for i, x in enumerate(self.years)}
+        with warnings.catch_warnings():
+            # Years without any data will give all-NaN slice warning
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            self.maxima = np.nanmax(self.values, axis=0)
+
+    def column(self, year: int) -> np.ndarray:
+        """
+        Values of all countries (in order of `codes`) for given year. This
+        is a view into the matrix, not a copy.
+        """
+        return self.values[:, self._year_index[year]]
+
+    def maximum(self, year: int) -> float:
+        """
+        Maximum value of the given year (NaN if there is no data)
+        """
+        return self.maxima[self._year_index[year]]
+
+    def year(self, year: int) -> Dict[str, float]:
+        """
+        Dictionary of country code and value for given year. Countries
+        without data are skipped. Unknown year gives empty dictionary.
+        """
+        if year not in self._year_index:
+            return {}
+        i = self._year_index[year]
+        mask = self.mask[:, i]
+        codes = np.asarray(self.codes, dtype=object)[mask]
+        return dict(zip(codes, self.values[mask, i]))
+
+
+def get_table(filename: str) -> WorldBankTable:
+    """
+    Returns shared table for given file
+    """
+    if filename not in _TABLES:
+        _TABLES[filename] = WorldBankTable(filename)
+    return _TABLES[filename]
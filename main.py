@@ -2,8 +2,84 @@
 #  Author: Rohit Suratekar
 #
 #  This files serves as an entry point to other scripts
+#
+#  Without arguments, default analysis is run interactively. All (or
+#  selected) analyses can be rendered headless in parallel with
+#
+#       python main.py --run all --jobs 8 --out output
+#
+#  Every analysis writes into its own folder (e.g. output/tea/plot.png).
+
+import argparse
+import importlib
+import sys
+import time
+
+# Name of the analysis and module which has `run()`
+ANALYSES = {
+    "bbt": "analysis2020.world.bbt",
+    "distances": "analysis2020.world.distances",
+    "gdp_compare": "analysis2020.world.gdp_compare",
+    "happiness": "analysis2020.world.happiness",
+    "maleria": "analysis2020.world.maleria",
+    "mgroad": "analysis2020.world.mgroad",
+    "running": "analysis2020.world.running",
+    "tea": "analysis2020.world.tea",
+    "unemployment": "analysis2020.world.unemployment",
+    "india_doctors": "analysis2020.india.doctors",
+    "india_female_cm": "analysis2020.india.female_cm",
+    "india_gdp": "analysis2020.india.gdp",
+    "india_google": "analysis2020.india.google",
+    "india_rainfall": "analysis2020.india.rainfall",
+    "india_stats": "analysis2020.india.stats",
+    "drinkingwater": "analysis2021.drinkingwater",
+}
+
+DEFAULT = "drinkingwater"
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description="GeoAnalysis")
+    parser.add_argument("--run", nargs="+", metavar="NAME",
+                        help="Analyses to render headless ('all' for "
+                             "everything)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Number of processes (default: all CPUs)")
+    parser.add_argument("--out", default="output",
+                        help="Output folder (default: output)")
+    parser.add_argument("--list", action="store_true",
+                        help="List available analyses")
+    return parser.parse_args(args)
+
+
+def main(args=None) -> int:
+    args = parse_args(args)
+    if args.list:
+        for name, module in ANALYSES.items():
+            print(f"{name:<20} {module}")
+        return 0
+
+    if args.run is None:
+        importlib.import_module(ANALYSES[DEFAULT]).run()
+        return 0
+
+    names = list(ANALYSES) if "all" in args.run else args.run
+    unknown = [x for x in names if x not in ANALYSES]
+    if len(unknown) > 0:
+        print(f"Unknown analyses: {unknown}. Use --list to see all.",
+              file=sys.stderr)
+        return 2
+
+    from helpers.batch import run_batch
+    start = time.perf_counter()
+    results = run_batch({x: ANALYSES[x] for x in names}, args.out,
+                        args.jobs)
+    print(f"{len(results)} analyses in {time.perf_counter() - start:.2f} s")
+    failed = [x for x in results if x.error]
+    for result in failed:
+        print(f"\n{result.name} failed:\n{result.error}", file=sys.stderr)
+    return 1 if len(failed) > 0 else 0
 
-from analysis2021.drinkingwater import run
 
 if __name__ == '__main__':
-    run()
+    sys.exit(main())